@@ -1,16 +1,31 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
-import firebase_admin
-from firebase_admin import credentials, auth as admin_auth, db
-import pyrebase
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, Response, abort, send_from_directory
 import os
 import json
-from werkzeug.utils import secure_filename
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
 import uuid
 import logging
-import pytz
-from dateutil.parser import parse
-from dateutil import tz
+import atexit
+import click
+from clients import FirebaseClients
+from timestamps import parse_timestamp, stamp
+from documents import DocumentTooLarge, FirebaseDocumentStore, LocalDocumentStore, store_upload
+from jobs import JobQueue
+from datastore import create_repository, CounterBatcher
+from cache import TTLCache
+import transitions
+import bulk
+from indexes import OPEN_STATUSES, SnapshotLoader
+from matching import SkillMatcher, normalize_skills
+from feed import RequestFeed
+from fanout import FanOut
+from archive import ArchiveStore
+from autoassign import AssignmentPlanner, local_time
+from urgency import UrgencyQueue, urgency_key
+from geo import GeoIndex, geocode, haversine_km, load_gazetteer, record_coordinates, valid_coordinates
+from transport import PooledSession
+from sessions import FileSessionStore, MemorySessionStore, ServerSessionInterface
+from metrics import AppMetrics
 
 # Set up logging
 logging.basicConfig(level=logging.DEBUG)
@@ -19,14 +34,38 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.secret_key = 'vision_ai_volunteer_portal_secret_key'
 
-# Update the Firebase Admin SDK initialization
-cred = credentials.Certificate("vision-ai-f6345-firebase-adminsdk-fbsvc-c2e0563bf0.json")
-firebase_admin.initialize_app(cred, {
+# Session data is kept server-side and the cookie only holds its ID.
+# SESSION_BACKEND=file (default) is shared by all workers on a host,
+# memory suits a single process, cookie restores Flask's signed cookie
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'file')
+SESSION_TTL = float(os.environ.get('SESSION_TTL_HOURS', 24 * 7)) * 3600
+SESSION_MAX = int(os.environ.get('SESSION_MAX', 100000))
+# SESSION_PERMANENT=1 makes the cookie outlive the browser; it is re-issued on
+# every response so it expires SESSION_TTL_HOURS after the last visit
+app.config['SESSION_PERMANENT'] = os.environ.get('SESSION_PERMANENT') == '1'
+app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(seconds=SESSION_TTL)
+if SESSION_BACKEND == 'memory':
+    app.session_interface = ServerSessionInterface(MemorySessionStore(SESSION_TTL, max_sessions=SESSION_MAX))
+elif SESSION_BACKEND == 'file':
+    app.session_interface = ServerSessionInterface(FileSessionStore(
+        os.environ.get('SESSION_PATH', os.path.join('instance', 'sessions')), SESSION_TTL, max_sessions=SESSION_MAX))
+
+# Route latency, database call and template render metrics, served at /metrics.
+# With PROFILE_HEADER=1 a request sent with `X-Profile: 1` gets its own
+# timings back in Server-Timing and X-Profile response headers
+metrics = AppMetrics(profiling=os.environ.get('PROFILE_HEADER') == '1')
+metrics.init_app(app)
+
+# The parts of a user's record kept in their session
+SESSION_USER_FIELDS = ('type', 'email', 'fullName', 'org_name')
+
+# Firebase Admin SDK configuration
+firebase_admin_options = {
     'databaseURL': 'https://vision-ai-f6345-default-rtdb.firebaseio.com',
     'projectId': 'vision-ai-f6345',
     'storageBucket': 'vision-ai-f6345.appspot.com',
     'authDomain': 'vision-ai-f6345.firebaseapp.com'
-})
+}
 
 # Update the Firebase client configuration
 firebase_config = {
@@ -40,33 +79,136 @@ firebase_config = {
     "measurementId": "G-E3M7W3KFJV"
 }
 
-# Update Pyrebase initialization
-try:
-    logger.debug("Initializing Pyrebase...")
-    firebase = pyrebase.initialize_app(firebase_config)
-    auth = firebase.auth()
-    pyrebase_db = firebase.database()
-    storage = firebase.storage()
-    logger.info("Pyrebase initialized successfully!")
-except Exception as e:
-    logger.error(f"Pyrebase initialization error: {str(e)}")
-    raise
+# Firebase clients are built on first use in each worker process, so startup
+# does no network or credential work and `gunicorn --preload` is safe.
+# Database and storage calls share one bounded keep-alive connection pool
+# per worker instead of Pyrebase's default session
+clients = FirebaseClients(
+    "vision-ai-f6345-firebase-adminsdk-fbsvc-c2e0563bf0.json",
+    firebase_admin_options,
+    firebase_config,
+    session_factory=lambda: PooledSession(
+        pool_size=int(os.environ.get('HTTP_POOL_SIZE', 16)),
+        pool_timeout=float(os.environ.get('HTTP_POOL_TIMEOUT', 10)),
+        on_transfer=metrics.add_transfer
+    )
+)
+
+# All database access goes through the repository. Set DATA_BACKEND=local to
+# run against the in-process stand-in (seeded from the RTDB export) instead.
+repo = create_repository(
+    os.environ.get('DATA_BACKEND', 'firebase'),
+    firebase=clients,
+    local_path=os.environ.get('LOCAL_DB_PATH'),
+    seed_path=os.environ.get('LOCAL_DB_SEED', 'vision-ai-f6345-default-rtdb-export.json'),
+    profile_cache=TTLCache(
+        maxsize=int(os.environ.get('PROFILE_CACHE_SIZE', 1024)),
+        ttl=float(os.environ.get('PROFILE_CACHE_TTL', 60))
+    )
+)
+repo.instrument = metrics
+
+def http_pool_stats():
+    """Connection pool stats of this worker's Firebase session; empty until Firebase is first used."""
+    return clients.firebase.requests.stats() if clients.client_ready else {}
+
+metrics.add_gauges('http_pool', http_pool_stats)
+metrics.add_gauges('profile_cache', repo.profile_cache.stats)
+
+# High-frequency stats (request views) are buffered and flushed as batched
+# server-side increments instead of one write per hit
+stats_counters = CounterBatcher(repo, interval=float(os.environ.get('STATS_FLUSH_INTERVAL', 5)))
+atexit.register(stats_counters.stop)
+
+# Thread pool that lets a route issue its independent Firebase calls at once
+fanout = FanOut(max_workers=int(os.environ.get('FANOUT_WORKERS', 16)),
+                max_concurrency=int(os.environ.get('FANOUT_MAX_CONCURRENCY', 4)))
+atexit.register(fanout.shutdown)
+
+# Side effects that need not hold up the response (e.g. verification emails)
+# run on background workers with retries and a dead-letter list
+job_queue = JobQueue(workers=int(os.environ.get('JOB_WORKERS', 2)),
+                     max_attempts=int(os.environ.get('JOB_MAX_ATTEMPTS', 5)))
+atexit.register(job_queue.stop)
+metrics.add_gauges('job_queue', job_queue.stats)
+
+
+@job_queue.handler('send_verification_email')
+def send_verification_email(uid):
+    """Email a verification link to a new user, signing in as them with a custom token."""
+    token = clients.admin_auth.create_custom_token(uid)
+    if isinstance(token, bytes):
+        token = token.decode('utf-8')
+    user_credentials = clients.auth.sign_in_with_custom_token(token)
+    clients.auth.send_email_verification(user_credentials['idToken'])
+    logger.info(f"Verification email sent to user {uid}")
+
+# Number of help requests shown per dashboard page
+DASHBOARD_PAGE_SIZE = 20
+
+# Most items accepted by one call to the bulk create/assign endpoints
+BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 200))
+
+# Automatic assignment: most active requests per volunteer, and most
+# assignments committed by one /auto-assign run
+assignment_planner = AssignmentPlanner(max_load=int(os.environ.get('AUTO_ASSIGN_MAX_LOAD', 3)))
+AUTO_ASSIGN_BATCH = int(os.environ.get('AUTO_ASSIGN_BATCH', 500))
+# Volunteers' availability slots are in local time: the organization's
+# `timezone` if it sets one, else APP_TIMEZONE (checked at startup)
+APP_TIMEZONE = os.environ.get('APP_TIMEZONE', 'Asia/Kolkata')
+ZoneInfo(APP_TIMEZONE)
+
+# The open help_requests queue, downloaded once per MATCH_INDEX_REFRESH seconds
+# (in the background) for all of the in-process indexes below and the live feed
+request_snapshot = SnapshotLoader(repo, refresh_interval=float(os.environ.get('MATCH_INDEX_REFRESH', 300)))
+metrics.add_gauges('request_snapshot', request_snapshot.stats)
+
+# In-process skill -> open request index backing the volunteer feed
+skill_matcher = SkillMatcher(request_snapshot)
+
+# In-process location grid over open requests backing the "nearby" feed.
+# GAZETTEER_PATH adds place names to the built-in city list used for geocoding
+if os.environ.get('GAZETTEER_PATH'):
+    load_gazetteer(os.environ['GAZETTEER_PATH'])
+geo_index = GeoIndex(request_snapshot)
+
+# In-process queue of open requests, most urgent first. Each priority level
+# counts as URGENCY_AGING_HOURS of waiting, so old low-priority requests rise
+urgency_queue = UrgencyQueue(request_snapshot, aging_hours=float(os.environ.get('URGENCY_AGING_HOURS', 24)))
+NEARBY_RADIUS_KM = float(os.environ.get('NEARBY_RADIUS_KM', 50))
+
+# Finished requests are archived into monthly partitions; `flask compact-archive`
+# moves completed requests older than ARCHIVE_AFTER_DAYS out of the hot collections
+archive_store = ArchiveStore(repo)
+ARCHIVE_AFTER_DAYS = int(os.environ.get('ARCHIVE_AFTER_DAYS', 30))
+
+# Uploaded documents are streamed to Firebase Storage, or with
+# DOCUMENT_STORE=local to a directory (served back from /documents/)
+if os.environ.get('DOCUMENT_STORE', 'firebase') == 'local':
+    document_store = LocalDocumentStore(os.environ.get('DOCUMENT_STORE_PATH', os.path.join('instance', 'documents')))
+else:
+    document_store = FirebaseDocumentStore(clients)
+REG_DOCUMENT_MAX_BYTES = int(os.environ.get('REG_DOCUMENT_MAX_MB', 10)) * 1024 * 1024
+REG_DOCUMENT_DEDUP = os.environ.get('REG_DOCUMENT_DEDUP', '').lower() in ('1', 'true', 'yes')
+# Reject oversized request bodies before they are read (leaves room for the form fields)
+app.config['MAX_CONTENT_LENGTH'] = REG_DOCUMENT_MAX_BYTES + 1024 * 1024
+
+# One shared help_requests change subscription per worker, fanned out to every
+# open dashboard over server-sent events
+request_feed = RequestFeed(request_snapshot, queue_size=int(os.environ.get('FEED_QUEUE_SIZE', 100)))
+metrics.add_gauges('request_feed', request_feed.stats)
+FEED_HEARTBEAT = float(os.environ.get('FEED_HEARTBEAT', 15))
 
 # Add this near the top of your file, after creating the Flask app
 def time_ago(dt_str):
-    """Convert a datetime string to a "time ago" string"""
+    """Convert a datetime string (or epoch milliseconds) to a "time ago" string"""
     try:
-        # Parse the datetime string
-        if isinstance(dt_str, str):
-            dt = parse(dt_str)
-        else:
-            dt = dt_str
-            
-        # Make sure datetime is timezone-aware
-        if dt.tzinfo is None:
-            dt = pytz.UTC.localize(dt)
+        # Parse the timestamp; naive values are taken as UTC
+        dt = parse_timestamp(dt_str)
+        if dt is None:
+            return str(dt_str)
             
-        now = datetime.now(pytz.UTC)
+        now = datetime.now(timezone.utc)
         diff = now - dt
 
         seconds = diff.total_seconds()
@@ -98,12 +240,11 @@ app.jinja_env.filters['time_ago'] = time_ago
 
 # Add these custom filters after creating the Flask app
 def format_date(dt_str):
-    """Convert a datetime string to a formatted date"""
+    """Convert a datetime string (or epoch milliseconds) to a formatted date"""
     try:
-        if isinstance(dt_str, str):
-            dt = parse(dt_str)
-        else:
-            dt = dt_str
+        dt = parse_timestamp(dt_str)
+        if dt is None:
+            return str(dt_str)
         return dt.strftime('%B %d, %Y')
     except Exception:
         return str(dt_str)
@@ -115,24 +256,120 @@ app.jinja_env.filters['date'] = format_date
 @app.template_filter('dateformat')
 def dateformat_filter(date, format='%d'):
     """Convert a date to a different format."""
-    if isinstance(date, str):
-        try:
-            date = datetime.fromisoformat(date.replace('Z', '+00:00'))
-        except ValueError:
-            return date
-    
-    if isinstance(date, datetime):
-        return date.strftime(format)
-    return date
+    parsed = parse_timestamp(date)
+    if parsed is None:
+        return date
+    return parsed.strftime(format)
 
 # Add this after creating the Flask app
 @app.template_filter('datetime')
 def parse_datetime(date_str):
     """Convert a date string to a datetime object."""
+    return parse_timestamp(date_str)
+
+def bucket_requests(*collections):
+    """Group request maps into per-status lists and counts in a single pass.
+
+    Open requests ('active' or 'pending') share the 'pending' bucket that the
+    org dashboard shows as active requests.
+    """
+    buckets = {'pending': [], 'assigned': [], 'completed': []}
+    priority_counts = {}
+    for collection in collections:
+        for request_id, request_data in (collection or {}).items():
+            status = request_data.get('status')
+            if status in OPEN_STATUSES:
+                status = 'pending'
+            buckets.setdefault(status, []).append(dict(request_data, id=request_id))
+            priority = request_data.get('priority', 'low')
+            priority_counts[priority] = priority_counts.get(priority, 0) + 1
+    
+    # Open requests are listed most urgent first
+    buckets['pending'].sort(key=lambda request_data: urgency_key(request_data, urgency_queue.aging_seconds))
+    status_counts = {status: len(items) for status, items in buckets.items()}
+    return buckets, status_counts, priority_counts
+
+def nearby_search(volunteer_data, args):
+    """``(origin, radius_km)`` of the "nearby" view: the browser position if sent,
+    else the volunteer's saved location (origin is None when neither is known)."""
+    origin = valid_coordinates(args.get('lat'), args.get('lng')) or record_coordinates(volunteer_data)
     try:
-        return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-    except (ValueError, AttributeError):
-        return None
+        radius = float(args.get('radius', NEARBY_RADIUS_KM))
+    except ValueError:
+        radius = NEARBY_RADIUS_KM
+    return origin, radius
+
+def feed_filter(user_id, user_type, args):
+    """Which help requests a dashboard's live feed should receive: those its view can show."""
+    if user_type == 'organization':
+        return lambda request_data: request_data.get('org_id') == user_id
+    
+    volunteer_data = repo.get_user(user_id) or {}
+    volunteer_skills = normalize_skills(volunteer_data.get('skills'))
+    view = args.get('view') or ('matches' if volunteer_skills else 'all')
+    if view == 'matches':
+        return lambda request_data: bool(volunteer_skills & normalize_skills(request_data.get('skills')))
+    if view == 'urgent':
+        # Requests ranked among the page's most urgent
+        return lambda request_data: urgency_key(request_data, urgency_queue.aging_seconds) \
+            <= urgency_queue.cutoff(DASHBOARD_PAGE_SIZE)
+    if view == 'nearby':
+        origin, radius = nearby_search(volunteer_data, args)
+        if not origin:
+            return lambda request_data: False
+        
+        def is_near(request_data):
+            point = record_coordinates(request_data)
+            return point is not None and haversine_km(origin, point) <= radius
+        return is_near
+    # The 'all' view lists every open request, newest first
+    return lambda request_data: True
+
+def build_help_request(request_data, org_id, now):
+    """Validate submitted request fields; returns ``(new_request, error_message)``."""
+    if not isinstance(request_data, dict):
+        return None, 'Request must be an object'
+    
+    # Validate required fields
+    if not all([
+        request_data.get('title'),
+        request_data.get('description'),
+        request_data.get('location')
+    ]):
+        return None, 'All required fields must be filled out'
+    
+    # Use the position picked on the client, else look up the location text
+    if request_data.get('lat') is not None or request_data.get('lng') is not None:
+        coordinates = valid_coordinates(request_data.get('lat'), request_data.get('lng'))
+        if not coordinates:
+            return None, 'Invalid coordinates'
+    else:
+        coordinates = geocode(request_data.get('location'))
+    
+    # Create request object
+    new_request = {
+        "title": request_data.get('title'),
+        "description": request_data.get('description'),
+        "location": request_data.get('location'),
+        "priority": request_data.get('priority', 'low'),
+        "request_type": request_data.get('request_type', 'other'),
+        "skills": request_data.get('skills', []),
+        "status": "active",
+        "org_id": org_id,
+        **stamp("created_at", now)
+    }
+    if coordinates:
+        new_request["coordinates"] = {"lat": coordinates[0], "lng": coordinates[1]}
+    return new_request, None
+
+def bulk_items(payload, key):
+    """The list under ``key`` of a bulk request body, or an error response."""
+    items = (payload or {}).get(key) if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        return None, (jsonify({'success': False, 'message': f"'{key}' must be a non-empty list"}), 400)
+    if len(items) > BULK_MAX_ITEMS:
+        return None, (jsonify({'success': False, 'message': f"At most {BULK_MAX_ITEMS} items per batch"}), 400)
+    return items, None
 
 # Routes
 @app.route('/')
@@ -153,6 +390,29 @@ def dashboard():
     else:
         return redirect(url_for('volunteer_dashboard'))
 
+@app.route('/stream/requests')
+def stream_requests():
+    if 'user' not in session:
+        return jsonify({'success': False, 'message': 'Please login first'}), 401
+    
+    predicate = feed_filter(session['user']['localId'], session['user'].get('type'), request.args)
+    subscription = request_feed.subscribe(predicate)
+    
+    def events():
+        try:
+            yield f"retry: {int(FEED_HEARTBEAT * 1000)}\n\n"
+            while True:
+                message = subscription.next_message(FEED_HEARTBEAT)
+                # Comment lines keep proxies from closing an idle connection
+                yield message or ": keep-alive\n\n"
+                if subscription.overflowed:
+                    break
+        finally:
+            request_feed.unsubscribe(subscription)
+    
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/volunteer-dashboard')
 def volunteer_dashboard():
     if 'user' not in session:
@@ -162,22 +422,61 @@ def volunteer_dashboard():
     user_id = session['user']['localId']
     
     # Get volunteer data
-    volunteer_data = pyrebase_db.child("users").child(user_id).get().val()
+    volunteer_data = repo.get_user(user_id)
     if not volunteer_data:
         flash('User profile not found', 'danger')
         return redirect(url_for('logout'))
     
-    # Get help requests
-    requests = pyrebase_db.child("help_requests").get().val() or {}
+    # Get one page of help requests: best skill matches, most urgent, nearest or newest first
+    view = request.args.get('view') or ('matches' if volunteer_data.get('skills') else 'all')
+    # Each view's loader returns (requests, next_cursor)
+    if view == 'matches':
+        load_requests = lambda: (skill_matcher.matching_requests(volunteer_data.get('skills'), k=DASHBOARD_PAGE_SIZE), None)
+    elif view == 'urgent':
+        load_requests = lambda: (urgency_queue.next_requests(DASHBOARD_PAGE_SIZE), None)
+    elif view == 'nearby':
+        origin, radius = nearby_search(volunteer_data, request.args)
+        if origin:
+            load_requests = lambda: (geo_index.nearby_requests(origin, k=DASHBOARD_PAGE_SIZE, max_km=radius), None)
+        else:
+            flash('Add your location to your profile to see nearby requests', 'info')
+            load_requests = lambda: ({}, None)
+    else:
+        def load_requests():
+            try:
+                return repo.get_help_requests_page(DASHBOARD_PAGE_SIZE, cursor=request.args.get('cursor'))
+            except ValueError:
+                return repo.get_help_requests_page(DASHBOARD_PAGE_SIZE)
     
-    # Count urgent requests
-    urgent_count = 0
-    if requests:
-        for request_id, request_data in requests.items():
-            if request_data.get('priority') == 'urgent':
-                urgent_count += 1
+    # The page and the counts are independent reads, so fetch them together.
+    # Counts come from the index nodes rather than a scan of help_requests
+    (requests, next_cursor), open_count, urgent_count = fanout.gather(
+        load_requests,
+        lambda: repo.count_help_requests('status', 'active'),
+        lambda: repo.count_help_requests('priority', 'urgent')
+    )
     
-    return render_template('volunteer_dashboard.html', volunteer=volunteer_data, requests=requests, urgent_count=urgent_count)
+    return render_template('volunteer_dashboard.html', volunteer=volunteer_data, requests=requests,
+                           open_count=open_count, urgent_count=urgent_count, next_cursor=next_cursor,
+                           view=view)
+
+@app.route('/triage')
+def triage():
+    """The next ``k`` most urgent open requests (an organization only sees its own)."""
+    if 'user' not in session:
+        return jsonify({'success': False, 'message': 'Please login first'}), 401
+    
+    k = max(1, min(request.args.get('k', DASHBOARD_PAGE_SIZE, type=int) or DASHBOARD_PAGE_SIZE, 500))
+    predicate = None
+    if session['user'].get('type') == 'organization':
+        org_id = session['user']['localId']
+        predicate = lambda request_data: request_data.get('org_id') == org_id
+    
+    return jsonify({
+        'success': True,
+        'requests': [dict(request_data, id=request_id)
+                     for request_id, request_data in urgency_queue.next(k, predicate)]
+    })
 
 @app.route('/org-dashboard')
 def org_dashboard():
@@ -187,16 +486,24 @@ def org_dashboard():
     
     user_id = session['user']['localId']
     
-    # Get organization data
-    org_data = pyrebase_db.child("organizations").child(user_id).get().val()
+    # Get organization data together with this organization's open help
+    # requests; assigned and completed ones live on the organization record itself
+    org_data, org_requests = fanout.gather(
+        lambda: repo.get_organization(user_id),
+        lambda: repo.get_help_requests_by('org_id', user_id)
+    )
     if not org_data:
         flash('Organization profile not found', 'danger')
         return redirect(url_for('logout'))
     
-    # Get help requests
-    requests = pyrebase_db.child("help_requests").get().val() or {}
+    buckets, status_counts, priority_counts = bucket_requests(
+        org_requests,
+        org_data.get('assigned_requests'),
+        org_data.get('completed_requests')
+    )
     
-    return render_template('org_dashboard.html', org=org_data, requests=requests)
+    return render_template('org_dashboard.html', org=org_data, buckets=buckets,
+                           status_counts=status_counts, priority_counts=priority_counts)
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -206,18 +513,21 @@ def login():
             password = request.form.get('password')
             
             # Authenticate user
-            user = auth.sign_in_with_email_and_password(email, password)
+            user = clients.auth.sign_in_with_email_and_password(email, password)
             
             # Get user data
-            user_data = pyrebase_db.child("users").child(user['localId']).get()
+            user_data = repo.get_user(user['localId'])
             
-            if user_data.val():
-                session['user'] = user_data.val()
+            if user_data:
+                # Keep only what routes read from the session; the rest is loaded when needed
+                if hasattr(session, 'regenerate'):
+                    session.regenerate()
+                session['user'] = {field: user_data[field] for field in SESSION_USER_FIELDS if field in user_data}
                 session['user']['localId'] = user['localId']  # Add user ID to session
                 flash('Login successful!', 'success')
                 
                 # Redirect based on user type
-                if user_data.val().get('type') == 'individual':
+                if user_data.get('type') == 'individual':
                     return redirect(url_for('volunteer_dashboard'))
                 else:
                     return redirect(url_for('org_dashboard'))
@@ -246,7 +556,7 @@ def register_individual():
             
             # Create user with Firebase Admin SDK
             logger.debug(f"Creating user with email: {email}")
-            user = admin_auth.create_user(
+            user = clients.admin_auth.create_user(
                 email=email,
                 password=password,
                 display_name=full_name,
@@ -263,13 +573,12 @@ def register_individual():
                 'createdAt': datetime.now().isoformat()
             }
             
-            db.reference(f'users/{user.uid}').set(user_data)
+            repo.set_user(user.uid, user_data)
             logger.info("User data stored in database")
             
-            # Send verification email using Pyrebase
-            user_credentials = auth.sign_in_with_email_and_password(email, password)
-            auth.send_email_verification(user_credentials['idToken'])
-            logger.info("Verification email sent")
+            # Send the verification email after responding
+            job_queue.enqueue('send_verification_email', user.uid)
+            logger.info("Verification email queued")
             
             flash('Registration successful! Please verify your email.', 'success')
             return redirect(url_for('login'))
@@ -299,23 +608,24 @@ def register_organization():
         website = request.form['website']
         reg_number = request.form['reg_number']
         
-        # Handle registration document upload
+        # Stream the registration document straight to storage
         reg_document = request.files['reg_document']
+        stored_document = None
         if reg_document:
-            filename = secure_filename(reg_document.filename)
-            unique_filename = f"{uuid.uuid4()}_{filename}"
-            reg_document.save(os.path.join("instance", unique_filename))
-            
-            # Upload to Firebase Storage
-            storage.child(f"org_documents/{unique_filename}").put(os.path.join("instance", unique_filename))
-            reg_document_url = storage.child(f"org_documents/{unique_filename}").get_url(None)
-            
-            # Remove local file after upload
-            os.remove(os.path.join("instance", unique_filename))
+            try:
+                stored_document = store_upload(document_store, reg_document, "org_documents",
+                                               REG_DOCUMENT_MAX_BYTES, dedup=REG_DOCUMENT_DEDUP)
+            except DocumentTooLarge as e:
+                flash(str(e), 'danger')
+                return render_template('register_organization.html')
+            except Exception as e:
+                logger.error(f"Error uploading registration document: {str(e)}")
+                flash('Registration failed: could not upload the registration document', 'danger')
+                return render_template('register_organization.html')
         
         try:
             # Create user in Firebase Auth
-            user = auth.create_user_with_email_and_password(email, password)
+            user = clients.auth.create_user_with_email_and_password(email, password)
             
             # Store additional information in Realtime Database
             org_data = {
@@ -324,35 +634,59 @@ def register_organization():
                 "phone": phone,
                 "website": website,
                 "reg_number": reg_number,
-                "reg_document_url": reg_document_url if reg_document else "",
+                "reg_document_url": stored_document['url'] if stored_document else "",
+                "reg_document_sha256": stored_document['sha256'] if stored_document else "",
                 "type": "organization",
                 "verification_status": "pending",
                 "created_at": datetime.now().isoformat(),
                 "domains": []
             }
             
-            pyrebase_db.child("organizations").child(user['localId']).set(org_data)
+            repo.set_organization(user['localId'], org_data)
             
             flash('Organization registration successful! Please wait for verification.', 'success')
             return redirect(url_for('login'))
         except Exception as e:
+            # Don't leave an unreferenced document behind (shared deduplicated ones stay)
+            if stored_document and not stored_document['reused']:
+                try:
+                    document_store.delete(stored_document['name'])
+                except Exception as cleanup_error:
+                    logger.warning(f"Could not remove uploaded document: {str(cleanup_error)}")
             flash('Registration failed: ' + str(e), 'danger')
             
     return render_template('register_organization.html')
 
+@app.errorhandler(413)
+def request_too_large(e):
+    message = f'Upload is too large (maximum {REG_DOCUMENT_MAX_BYTES // (1024 * 1024)} MB)'
+    if request.is_json:
+        return jsonify({'success': False, 'message': message}), 413
+    flash(message, 'danger')
+    return redirect(request.path)
+
+@app.route('/documents/<path:name>')
+def serve_document(name):
+    # Only the local document store serves files itself
+    if 'user' not in session or not isinstance(document_store, LocalDocumentStore):
+        abort(404)
+    return send_from_directory(os.path.abspath(document_store.root), name)
+
 @app.route('/request/<request_id>')
 def view_request(request_id):
     if 'user' not in session:
         flash('Please login first', 'warning')
         return redirect(url_for('login'))
     
-    help_request = pyrebase_db.child("help_requests").child(request_id).get().val()
+    help_request = repo.get_help_request(request_id)
     if not help_request:
         flash('Request not found', 'warning')
         return redirect(url_for('dashboard'))
     
+    stats_counters.add(f"request_views/{request_id}")
+    
     # Get requester info
-    requester = pyrebase_db.child("users").child(help_request.get('user_id')).get().val() or {}
+    requester = repo.get_user(help_request.get('user_id')) or {}
     
     return render_template('request_details.html', request=help_request, request_id=request_id, requester=requester)
 
@@ -365,7 +699,7 @@ def accept_request(request_id):
     
     try:
         # Get the request data first
-        request_data = pyrebase_db.child("help_requests").child(request_id).get().val()
+        request_data = repo.get_help_request(request_id)
         
         if not request_data:
             return jsonify({'success': False, 'message': 'Request not found'}), 404
@@ -373,38 +707,9 @@ def accept_request(request_id):
         if request_data.get('status') == 'accepted':
             return jsonify({'success': False, 'message': 'Request already accepted'}), 400
         
-        # Add volunteer information and status
-        request_data.update({
-            "status": "assigned",
-            "volunteer_id": user_id,
-            "accepted_at": datetime.now(pytz.UTC).isoformat()
-        })
-        
-        # Move to assigned_requests collection
-        pyrebase_db.child("assigned_requests").child(request_id).set(request_data)
-        
-        # Remove from help_requests
-        pyrebase_db.child("help_requests").child(request_id).remove()
-        
-        # Update volunteer stats
-        volunteer_ref = pyrebase_db.child("users").child(user_id)
-        volunteer_data = volunteer_ref.get().val() or {}
-        
-        # Increment assignment count
-        current_count = volunteer_data.get('assignments_count', 0)
-        volunteer_ref.update({
-            "assignments_count": current_count + 1,
-            "last_assignment": datetime.now(pytz.UTC).isoformat()
-        })
-        
-        # Add to volunteer's active assignments
-        active_assignments = volunteer_data.get('active_assignments', {})
-        active_assignments[request_id] = {
-            "request_id": request_id,
-            "title": request_data.get('title'),
-            "accepted_at": datetime.now(pytz.UTC).isoformat()
-        }
-        volunteer_ref.child('active_assignments').set(active_assignments)
+        # Move the request, update volunteer stats and active assignments in one write
+        transitions.accept_request(repo, request_id, request_data, user_id,
+                                   datetime.now(timezone.utc).isoformat())
         
         return jsonify({
             'success': True,
@@ -424,7 +729,7 @@ def complete_request(request_id):
     
     try:
         # Get the assigned request data
-        request_data = pyrebase_db.child("assigned_requests").child(request_id).get().val()
+        request_data = repo.get(f"assigned_requests/{request_id}")
         
         if not request_data:
             return jsonify({'success': False, 'message': 'Request not found'}), 404
@@ -433,43 +738,9 @@ def complete_request(request_id):
         if request_data.get('volunteer_id') != user_id:
             return jsonify({'success': False, 'message': 'You are not assigned to this request'}), 403
         
-        # Update status and completion data
-        request_data.update({
-            "status": "completed",
-            "completed_at": datetime.now(pytz.UTC).isoformat()
-        })
-        
-        # Move to completed_requests collection
-        pyrebase_db.child("completed_requests").child(request_id).set(request_data)
-        
-        # Remove from assigned_requests
-        pyrebase_db.child("assigned_requests").child(request_id).remove()
-        
-        # Update volunteer stats
-        volunteer_ref = pyrebase_db.child("users").child(user_id)
-        volunteer_data = volunteer_ref.get().val() or {}
-        
-        # Increment completion count
-        current_count = volunteer_data.get('completions_count', 0)
-        volunteer_ref.update({
-            "completions_count": current_count + 1,
-            "last_completion": datetime.now(pytz.UTC).isoformat()
-        })
-        
-        # Remove from active assignments
-        active_assignments = volunteer_data.get('active_assignments', {})
-        if request_id in active_assignments:
-            del active_assignments[request_id]
-            volunteer_ref.child('active_assignments').set(active_assignments)
-        
-        # Add to completed assignments
-        completed_assignments = volunteer_data.get('completed_assignments', {})
-        completed_assignments[request_id] = {
-            "request_id": request_id,
-            "title": request_data.get('title'),
-            "completed_at": datetime.now(pytz.UTC).isoformat()
-        }
-        volunteer_ref.child('completed_assignments').set(completed_assignments)
+        # Move the request, update volunteer stats and assignment lists in one write
+        transitions.complete_request(repo, request_id, request_data,
+                                     datetime.now(timezone.utc).isoformat())
         
         return jsonify({
             'success': True,
@@ -495,14 +766,13 @@ def add_skill():
         if not skill:
             return jsonify({'success': False, 'message': 'Skill cannot be empty'}), 400
         
-        # Get current skills
-        user_ref = pyrebase_db.child("users").child(user_id)
-        user_data = user_ref.get().val() or {}
-        current_skills = user_data.get('skills', [])
+        # Read the current skills uncached: a cached profile may predate
+        # skills added since by this or another worker
+        current_skills = repo.get(f"users/{user_id}/skills") or []
         
         if skill not in current_skills:
             current_skills.append(skill)
-            user_ref.update({"skills": current_skills})
+            repo.update_user(user_id, {"skills": current_skills})
         
         return jsonify({'success': True, 'message': 'Skill added successfully!'})
         
@@ -531,20 +801,14 @@ def add_event():
             "title": title,
             "date": date,
             "time": time,
-            "created_at": datetime.now(pytz.UTC).isoformat()
+            "created_at": datetime.now(timezone.utc).isoformat()
         }
         
-        # Get current schedule
-        user_ref = pyrebase_db.child("users").child(user_id)
-        user_data = user_ref.get().val() or {}
-        schedule = user_data.get('schedule', {})
-        
         # Generate unique ID for the event
         event_id = str(uuid.uuid4())
-        schedule[event_id] = event
         
-        # Update user's schedule
-        user_ref.child('schedule').set(schedule)
+        # Add the event to the user's schedule without rewriting the rest of it
+        repo.set(f"users/{user_id}/schedule/{event_id}", event)
         
         return jsonify({'success': True, 'message': 'Event added successfully!'})
         
@@ -572,13 +836,13 @@ def profile(user_type, user_id):
         return redirect(url_for('dashboard'))
     
     if user_type == 'volunteer':
-        volunteer_data = pyrebase_db.child("users").child(user_id).get().val()
+        volunteer_data = repo.get_user(user_id)
         if volunteer_data:
             # Add localId to the volunteer data so it's accessible in the template
             volunteer_data['localId'] = user_id
             return render_template('volunteer_profile.html', volunteer=volunteer_data)
     elif user_type == 'organization':
-        org_data = pyrebase_db.child("organizations").child(user_id).get().val()
+        org_data = repo.get_organization(user_id)
         if org_data:
             # Add localId to the org data so it's accessible in the template
             org_data['localId'] = user_id
@@ -592,7 +856,7 @@ def test_firebase():
     try:
         logger.debug("Testing Firebase connection...")
         # Try to read from the database
-        test_ref = pyrebase_db.child("test").get()
+        test_ref = repo.get("test")
         logger.info("Firebase connection successful!")
         return jsonify({
             "status": "success",
@@ -607,11 +871,43 @@ def test_firebase():
             "timestamp": datetime.now().isoformat()
         }), 500
 
+def require_metrics_token():
+    """Abort with 401 unless the request carries the METRICS_TOKEN bearer token (when one is set)."""
+    token = os.environ.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        abort(401)
+
+@app.route('/http-pool-stats')
+def http_pool_stats_endpoint():
+    require_metrics_token()
+    return jsonify({
+        "status": "success",
+        "pool": http_pool_stats(),
+        "timestamp": datetime.now().isoformat()
+    })
+
+@app.route('/metrics')
+def metrics_endpoint():
+    # Set METRICS_TOKEN to require `Authorization: Bearer <token>` from the scraper
+    require_metrics_token()
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/job-queue-stats')
+def job_queue_stats():
+    # Dead letters carry job arguments (user IDs) and error text
+    require_metrics_token()
+    return jsonify({
+        "status": "success",
+        "jobs": job_queue.stats(),
+        "dead_letters": job_queue.dead_letters(),
+        "timestamp": datetime.now().isoformat()
+    })
+
 @app.route('/test-firebase-auth')
 def test_firebase_auth():
     try:
         # Test user creation (will not actually create)
-        auth.get_account_info("test")
+        clients.auth.get_account_info("test")
         return jsonify({
             "status": "success",
             "message": "Firebase Auth is properly configured",
@@ -628,23 +924,21 @@ def test_firebase_auth():
 @app.route('/test-firebase-config')
 def test_firebase_config():
     try:
-        # Test Admin SDK
-        logger.debug("Testing Admin SDK...")
-        admin_test = admin_auth.list_users(max_results=1)
-        logger.info("Admin SDK test successful")
-
-        # Test Pyrebase Database
-        logger.debug("Testing Pyrebase Database...")
-        test_ref = pyrebase_db.child('test').set({"timestamp": datetime.now().isoformat()})
-        logger.info("Pyrebase Database test successful")
-
-        # Test Pyrebase Auth
-        logger.debug("Testing Pyrebase Auth...")
-        try:
-            # Try to get a test user (this will fail safely if user doesn't exist)
-            test_user = auth.get_account_info("test_token")
-        except Exception as auth_error:
-            logger.warning(f"Auth test expected error: {str(auth_error)}")
+        # Probe the Admin SDK, Pyrebase Database and Pyrebase Auth at the same time
+        logger.debug("Testing Admin SDK, Pyrebase Database and Pyrebase Auth...")
+        admin_test, test_ref, auth_test = fanout.gather(
+            lambda: clients.admin_auth.list_users(max_results=1),
+            lambda: repo.set("test", {"timestamp": datetime.now().isoformat()}),
+            # Getting a test user fails safely if the user doesn't exist
+            lambda: clients.auth.get_account_info("test_token"),
+            return_exceptions=True
+        )
+        for name, result in (("Admin SDK", admin_test), ("Pyrebase Database", test_ref)):
+            if isinstance(result, Exception):
+                raise result
+            logger.info(f"{name} test successful")
+        if isinstance(auth_test, Exception):
+            logger.warning(f"Auth test expected error: {str(auth_test)}")
 
         return jsonify({
             "status": "success",
@@ -671,31 +965,12 @@ def create_request():
     
     try:
         # Get request data from form
-        request_data = request.json
-        
-        # Validate required fields
-        if not all([
-            request_data.get('title'),
-            request_data.get('description'),
-            request_data.get('location')
-        ]):
-            return jsonify({'success': False, 'message': 'All required fields must be filled out'}), 400
-        
-        # Create request object
-        new_request = {
-            "title": request_data.get('title'),
-            "description": request_data.get('description'),
-            "location": request_data.get('location'),
-            "priority": request_data.get('priority', 'low'),
-            "request_type": request_data.get('request_type', 'other'),
-            "skills": request_data.get('skills', []),
-            "status": "active",
-            "org_id": user_id,
-            "created_at": datetime.now(pytz.UTC).isoformat()
-        }
+        new_request, error = build_help_request(request.json, user_id, datetime.now(timezone.utc).isoformat())
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
         
         # Generate a unique ID for the request
-        request_id = pyrebase_db.child("help_requests").push(new_request)['name']
+        request_id = repo.create_help_request(new_request)
         
         return jsonify({
             'success': True,
@@ -707,6 +982,49 @@ def create_request():
         logger.error(f"Error creating request: {str(e)}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/create-requests', methods=['POST'])
+def create_requests():
+    """Create a batch of help requests: ``{"requests": [...]}``.
+
+    Every item is validated; the valid ones are created in one write. The
+    response lists a result per item, in order.
+    """
+    if 'user' not in session:
+        return jsonify({'success': False, 'message': 'Please login first'}), 401
+    
+    user_id = session['user']['localId']
+    items, error_response = bulk_items(request.get_json(silent=True), 'requests')
+    if error_response:
+        return error_response
+    
+    try:
+        now = datetime.now(timezone.utc).isoformat()
+        results = []
+        valid = []
+        for index, item in enumerate(items):
+            new_request, error = build_help_request(item, user_id, now)
+            if error:
+                results.append({'index': index, 'success': False, 'message': error})
+            else:
+                results.append({'index': index, 'success': True})
+                valid.append((index, new_request))
+        
+        # One multi-path write for all valid requests and their index entries
+        request_ids = repo.create_help_requests([new_request for _, new_request in valid])
+        for (index, _), request_id in zip(valid, request_ids):
+            results[index]['request_id'] = request_id
+        
+        return jsonify({
+            'success': len(valid) == len(items),
+            'message': f"Created {len(valid)} of {len(items)} requests",
+            'created': len(valid),
+            'results': results
+        })
+        
+    except Exception as e:
+        logger.error(f"Error creating requests: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
 @app.route('/add-domain', methods=['POST'])
 def add_domain():
     if 'user' not in session:
@@ -721,14 +1039,12 @@ def add_domain():
         if not domain:
             return jsonify({'success': False, 'message': 'Domain name cannot be empty'}), 400
         
-        # Get current domains
-        org_ref = pyrebase_db.child("organizations").child(user_id)
-        org_data = org_ref.get().val() or {}
-        current_domains = org_data.get('domains', [])
+        # Read the current domains uncached (see add_skill)
+        current_domains = repo.get(f"organizations/{user_id}/domains") or []
         
         if domain not in current_domains:
             current_domains.append(domain)
-            org_ref.update({"domains": current_domains})
+            repo.update_organization(user_id, {"domains": current_domains})
         
         return jsonify({'success': True, 'message': 'Service domain added successfully!'})
         
@@ -752,43 +1068,46 @@ def add_volunteer():
         if not email:
             return jsonify({'success': False, 'message': 'Volunteer email cannot be empty'}), 400
         
-        # Look up user by email
-        try:
-            user = admin_auth.get_user_by_email(email)
-            volunteer_id = user.uid
-        except Exception as e:
-            return jsonify({'success': False, 'message': f'Volunteer not found: {str(e)}'}), 404
+        # Look up the user by email and their volunteer profile, while the
+        # organization record is read alongside
+        def find_volunteer():
+            user = clients.admin_auth.get_user_by_email(email)
+            return user.uid, repo.get_user(user.uid)
+        
+        volunteer_lookup, org_data = fanout.gather(
+            find_volunteer,
+            lambda: repo.get_organization(org_id),
+            return_exceptions=True
+        )
+        if isinstance(volunteer_lookup, Exception):
+            return jsonify({'success': False, 'message': f'Volunteer not found: {str(volunteer_lookup)}'}), 404
+        if isinstance(org_data, Exception):
+            raise org_data
+        volunteer_id, volunteer = volunteer_lookup
+        org_data = org_data or {}
         
         # Check if user exists in the 'users' collection
-        volunteer = pyrebase_db.child("users").child(volunteer_id).get().val()
         if not volunteer:
             return jsonify({'success': False, 'message': 'User is not registered as a volunteer'}), 404
         
-        # Add volunteer to organization's volunteer list
-        org_ref = pyrebase_db.child("organizations").child(org_id)
-        org_data = org_ref.get().val() or {}
-        volunteers = org_data.get('volunteers', {})
-        
-        volunteers[volunteer_id] = {
-            "name": volunteer.get('fullName', 'Volunteer'),
-            "email": email,
-            "role": role,
-            "notes": notes,
-            "added_at": datetime.now(pytz.UTC).isoformat(),
-            "status": "active"
-        }
-        
-        org_ref.child('volunteers').set(volunteers)
-        
-        # Also add organization to volunteer's organization list
-        volunteer_orgs = volunteer.get('organizations', {})
-        volunteer_orgs[org_id] = {
-            "org_name": org_data.get('org_name', 'Organization'),
-            "role": role,
-            "joined_at": datetime.now(pytz.UTC).isoformat()
-        }
         
-        pyrebase_db.child("users").child(volunteer_id).child('organizations').set(volunteer_orgs)
+        # Add volunteer to organization's volunteer list and the organization to
+        # the volunteer's list, writing only the two new children
+        repo.update_many({
+            f"organizations/{org_id}/volunteers/{volunteer_id}": {
+                "name": volunteer.get('fullName', 'Volunteer'),
+                "email": email,
+                "role": role,
+                "notes": notes,
+                "added_at": datetime.now(timezone.utc).isoformat(),
+                "status": "active"
+            },
+            f"users/{volunteer_id}/organizations/{org_id}": {
+                "org_name": org_data.get('org_name', 'Organization'),
+                "role": role,
+                "joined_at": datetime.now(timezone.utc).isoformat()
+            }
+        })
         
         return jsonify({'success': True, 'message': 'Volunteer added successfully!'})
         
@@ -812,8 +1131,11 @@ def assign_request():
         if not request_id or not volunteer_id:
             return jsonify({'success': False, 'message': 'Request ID and volunteer ID are required'}), 400
         
-        # Get request data
-        request_data = pyrebase_db.child("help_requests").child(request_id).get().val()
+        # Get request and volunteer data
+        request_data, volunteer_data = fanout.gather(
+            lambda: repo.get_help_request(request_id),
+            lambda: repo.get_user(volunteer_id)
+        )
         if not request_data:
             return jsonify({'success': False, 'message': 'Request not found'}), 404
         
@@ -821,55 +1143,152 @@ def assign_request():
         if request_data.get('org_id') != org_id:
             return jsonify({'success': False, 'message': 'You do not have permission to assign this request'}), 403
         
-        # Get volunteer data
-        volunteer_data = pyrebase_db.child("users").child(volunteer_id).get().val()
         if not volunteer_data:
             return jsonify({'success': False, 'message': 'Volunteer not found'}), 404
         
-        # Update request with volunteer information and assignment details
-        request_data.update({
-            "status": "assigned",
-            "volunteer_id": volunteer_id,
-            "volunteer_name": volunteer_data.get('fullName', 'Volunteer'),
-            "assignment_notes": notes,
-            "assigned_at": datetime.now(pytz.UTC).isoformat()
+        # Move the request to the organization and update the volunteer in one write
+        transitions.assign_request(repo, request_id, request_data, org_id,
+                                   session['user'].get('org_name', 'Organization'),
+                                   volunteer_id, volunteer_data, notes,
+                                   datetime.now(timezone.utc).isoformat())
+        
+        return jsonify({
+            'success': True,
+            'message': 'Request assigned successfully!'
         })
         
-        # Move to assigned_requests collection in organization
-        org_ref = pyrebase_db.child("organizations").child(org_id)
-        assigned_requests = org_ref.child("assigned_requests").get().val() or {}
-        assigned_requests[request_id] = request_data
-        org_ref.child("assigned_requests").set(assigned_requests)
-        
-        # Remove from help_requests
-        pyrebase_db.child("help_requests").child(request_id).remove()
-        
-        # Add to volunteer's active assignments
-        volunteer_ref = pyrebase_db.child("users").child(volunteer_id)
-        active_assignments = volunteer_ref.child("active_assignments").get().val() or {}
-        active_assignments[request_id] = {
-            "request_id": request_id,
-            "title": request_data.get('title'),
-            "assigned_at": datetime.now(pytz.UTC).isoformat(),
-            "org_id": org_id,
-            "org_name": session['user'].get('org_name', 'Organization')
-        }
-        volunteer_ref.child('active_assignments').set(active_assignments)
+    except Exception as e:
+        logger.error(f"Error assigning request: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/assign-requests', methods=['POST'])
+def assign_requests():
+    """Assign a batch of requests: ``{"assignments": [{"request_id", "volunteer_id", "notes"}]}``.
+
+    The organization's open requests are read with one query and the
+    volunteers concurrently; the valid assignments are committed in one
+    write. The response lists a result per item, in order.
+    """
+    if 'user' not in session:
+        return jsonify({'success': False, 'message': 'Please login first'}), 401
+    
+    org_id = session['user']['localId']
+    items, error_response = bulk_items(request.get_json(silent=True), 'assignments')
+    if error_response:
+        return error_response
+    
+    try:
+        volunteer_ids = sorted({item.get('volunteer_id') for item in items
+                                if isinstance(item, dict) and item.get('volunteer_id')})
+        org_requests, *volunteers = fanout.gather(
+            lambda: repo.get_help_requests_by('org_id', org_id) or {},
+            *[lambda volunteer_id=volunteer_id: repo.get_user(volunteer_id) for volunteer_id in volunteer_ids]
+        )
+        volunteers = dict(zip(volunteer_ids, volunteers))
+        
+        results = []
+        assignments = []
+        seen = set()
+        for index, item in enumerate(items):
+            item = item if isinstance(item, dict) else {}
+            request_id = item.get('request_id')
+            volunteer_id = item.get('volunteer_id')
+            if not request_id or not volunteer_id:
+                error = 'Request ID and volunteer ID are required'
+            elif request_id in seen:
+                error = 'Request appears more than once in this batch'
+            elif request_id not in org_requests:
+                # Only this organization's open requests are candidates
+                error = 'Request not found'
+            elif not volunteers.get(volunteer_id):
+                error = 'Volunteer not found'
+            else:
+                error = None
+            
+            if error:
+                results.append({'index': index, 'request_id': request_id, 'success': False, 'message': error})
+                continue
+            seen.add(request_id)
+            results.append({'index': index, 'request_id': request_id, 'success': True})
+            assignments.append((request_id, org_requests[request_id], volunteer_id,
+                                volunteers[volunteer_id], item.get('notes', '')))
+        
+        # Move every request and update every volunteer in one write
+        transitions.assign_requests(repo, org_id, session['user'].get('org_name', 'Organization'),
+                                    assignments, datetime.now(timezone.utc).isoformat())
         
-        # Update assignment count for the volunteer
-        assignments_count = volunteer_data.get('assignments_count', 0)
-        volunteer_ref.update({
-            "assignments_count": assignments_count + 1,
-            "last_assignment": datetime.now(pytz.UTC).isoformat()
+        return jsonify({
+            'success': len(assignments) == len(items),
+            'message': f"Assigned {len(assignments)} of {len(items)} requests",
+            'assigned': len(assignments),
+            'results': results
         })
         
+    except Exception as e:
+        logger.error(f"Error assigning requests: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/auto-assign', methods=['POST'])
+def auto_assign():
+    """Assign the organization's open requests to its active volunteers.
+
+    Accepts ``{"dry_run": bool, "limit": int}``; a dry run returns the plan
+    without writing it.
+    """
+    if 'user' not in session:
+        return jsonify({'success': False, 'message': 'Please login first'}), 401
+    if session['user'].get('type') != 'organization':
+        return jsonify({'success': False, 'message': 'Only organizations can assign requests'}), 403
+    
+    org_id = session['user']['localId']
+    options = request.get_json(silent=True) or {}
+    if not isinstance(options, dict):
+        return jsonify({'success': False, 'message': 'Request body must be an object'}), 400
+    try:
+        limit = int(options.get('limit') or AUTO_ASSIGN_BATCH)
+    except (TypeError, ValueError):
+        limit = 0
+    if limit < 1:
+        return jsonify({'success': False, 'message': "'limit' must be a positive integer"}), 400
+    limit = min(limit, AUTO_ASSIGN_BATCH)
+    
+    try:
+        org_data, org_requests = fanout.gather(
+            lambda: repo.get_organization(org_id),
+            lambda: repo.get_help_requests_by('org_id', org_id) or {}
+        )
+        if not org_data:
+            return jsonify({'success': False, 'message': 'Organization profile not found'}), 404
+        
+        # Profiles (skills, schedule, active assignments) of the active volunteers
+        volunteer_ids = [volunteer_id for volunteer_id, membership in (org_data.get('volunteers') or {}).items()
+                         if (membership or {}).get('status', 'active') == 'active']
+        profiles = fanout.gather(*[lambda volunteer_id=volunteer_id: repo.get_user(volunteer_id)
+                                   for volunteer_id in volunteer_ids])
+        volunteers = {volunteer_id: profile for volunteer_id, profile in zip(volunteer_ids, profiles) if profile}
+        
+        now = datetime.now(timezone.utc)
+        plan, unassigned = assignment_planner.plan(
+            org_requests, volunteers, local_time(now, org_data.get('timezone'), APP_TIMEZONE), limit=limit)
+        
+        if not options.get('dry_run'):
+            # Every planned assignment is committed in one write
+            transitions.assign_requests(
+                repo, org_id, org_data.get('org_name', 'Organization'),
+                [(request_id, org_requests[request_id], volunteer_id, volunteers[volunteer_id], 'Auto-assigned')
+                 for request_id, volunteer_id, _ in plan],
+                now.isoformat())
+        
         return jsonify({
             'success': True,
-            'message': 'Request assigned successfully!'
+            'message': f"{'Planned' if options.get('dry_run') else 'Assigned'} {len(plan)} of {len(org_requests)} requests",
+            'assignments': [{'request_id': request_id, 'volunteer_id': volunteer_id, 'score': score}
+                            for request_id, volunteer_id, score in plan],
+            'unassigned': unassigned
         })
         
     except Exception as e:
-        logger.error(f"Error assigning request: {str(e)}")
+        logger.error(f"Error auto-assigning requests: {str(e)}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
 @app.route('/archive-request/<request_id>', methods=['POST'])
@@ -881,23 +1300,13 @@ def archive_request(request_id):
     
     try:
         # Get the completed request data
-        org_ref = pyrebase_db.child("organizations").child(org_id)
-        completed_requests = org_ref.child("completed_requests").get().val() or {}
-        
-        request_data = completed_requests.get(request_id)
+        request_data = repo.get(f"organizations/{org_id}/completed_requests/{request_id}")
         if not request_data:
             return jsonify({'success': False, 'message': 'Completed request not found'}), 404
         
-        # Move to archived_requests collection
-        archived_requests = org_ref.child("archived_requests").get().val() or {}
-        request_data["archived_at"] = datetime.now(pytz.UTC).isoformat()
-        archived_requests[request_id] = request_data
-        
-        org_ref.child("archived_requests").set(archived_requests)
-        
-        # Remove from completed_requests
-        completed_requests.pop(request_id)
-        org_ref.child("completed_requests").set(completed_requests)
+        # Move to this month's archive partition
+        transitions.archive_request(repo, org_id, request_id, request_data,
+                                    datetime.now(timezone.utc).isoformat())
         
         return jsonify({
             'success': True,
@@ -917,56 +1326,19 @@ def org_complete_request(request_id):
     
     try:
         # Get the assigned request data
-        org_ref = pyrebase_db.child("organizations").child(org_id)
-        assigned_requests = org_ref.child("assigned_requests").get().val() or {}
-        
-        request_data = assigned_requests.get(request_id)
+        request_data = repo.get(f"organizations/{org_id}/assigned_requests/{request_id}")
         if not request_data:
             return jsonify({'success': False, 'message': 'Assigned request not found'}), 404
         
-        # Update status and completion data
-        request_data.update({
-            "status": "completed",
-            "completed_at": datetime.now(pytz.UTC).isoformat(),
-            "completed_by_org": True
-        })
-        
-        # Move to completed_requests collection
-        completed_requests = org_ref.child("completed_requests").get().val() or {}
-        completed_requests[request_id] = request_data
-        org_ref.child("completed_requests").set(completed_requests)
-        
-        # Remove from assigned_requests
-        assigned_requests.pop(request_id)
-        org_ref.child("assigned_requests").set(assigned_requests)
-        
-        # Update volunteer stats if there's a volunteer assigned
+        # Volunteer stats are only updated if there's a volunteer assigned
         volunteer_id = request_data.get('volunteer_id')
-        if volunteer_id:
-            volunteer_ref = pyrebase_db.child("users").child(volunteer_id)
-            volunteer_data = volunteer_ref.get().val() or {}
-            
-            # Increment completion count
-            completions_count = volunteer_data.get('completions_count', 0)
-            volunteer_ref.update({
-                "completions_count": completions_count + 1,
-                "last_completion": datetime.now(pytz.UTC).isoformat()
-            })
-            
-            # Remove from active assignments and add to completed assignments
-            active_assignments = volunteer_data.get('active_assignments', {})
-            if request_id in active_assignments:
-                active_assignments.pop(request_id)
-                volunteer_ref.child('active_assignments').set(active_assignments)
-                
-                completed_assignments = volunteer_data.get('completed_assignments', {})
-                completed_assignments[request_id] = {
-                    "request_id": request_id,
-                    "title": request_data.get('title'),
-                    "completed_at": datetime.now(pytz.UTC).isoformat(),
-                    "org_id": org_id
-                }
-                volunteer_ref.child('completed_assignments').set(completed_assignments)
+        was_active_assignment = bool(
+            volunteer_id and repo.get(f"users/{volunteer_id}/active_assignments/{request_id}")
+        )
+        
+        # Move the request and update the volunteer in one write
+        transitions.org_complete_request(repo, org_id, request_id, request_data, was_active_assignment,
+                                         datetime.now(timezone.utc).isoformat())
         
         return jsonify({
             'success': True,
@@ -977,6 +1349,75 @@ def org_complete_request(request_id):
         logger.error(f"Error completing request: {str(e)}")
         return jsonify({'success': False, 'message': str(e)}), 500
 
+@app.route('/org/archive')
+def org_archive():
+    if 'user' not in session:
+        return jsonify({'success': False, 'message': 'Please login first'}), 401
+    if session['user'].get('type') != 'organization':
+        return jsonify({'success': False, 'message': 'Only organizations can view the archive'}), 403
+    
+    # Month range in YYYY-MM, e.g. ?from=2024-01&to=2024-06
+    start = request.args.get('from') or None
+    end = request.args.get('to') or None
+    for month in (start, end):
+        if month is not None:
+            try:
+                datetime.strptime(month, '%Y-%m')
+            except ValueError:
+                return jsonify({'success': False, 'message': 'Months must be in YYYY-MM format'}), 400
+    limit = min(request.args.get('limit', 100, type=int) or 100, 1000)
+    
+    try:
+        requests = archive_store.query(start, end, org_id=session['user']['localId'], limit=limit)
+        return jsonify({'success': True, 'requests': requests})
+    except Exception as e:
+        logger.error(f"Error reading archive: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.cli.command('compact-archive')
+@click.option('--days', default=ARCHIVE_AFTER_DAYS, show_default=True,
+              help='Archive requests completed more than this many days ago.')
+def compact_archive_command(days):
+    """Move old completed requests into the monthly archive partitions."""
+    moved = archive_store.compact(older_than_days=days)
+    click.echo(f"Archived {moved} requests")
+
+@app.cli.command('import-snapshot')
+@click.argument('source', type=click.Path(exists=True, dir_okay=False))
+@click.option('--only', 'collections', multiple=True, help='Top-level collection to import (repeatable).')
+@click.option('--depth', default=2, show_default=True, help='Levels below the root written as one record.')
+@click.option('--batch-size', default=500, show_default=True, help='Records per multi-path update.')
+@click.option('--workers', default=4, show_default=True, help='Concurrent batch writers.')
+@click.option('--checkpoint', default=None, help='Progress file; defaults to SOURCE.checkpoint.')
+def import_snapshot_command(source, collections, depth, batch_size, workers, checkpoint):
+    """Stream a database export (JSON or NDJSON) into the database."""
+    written = bulk.import_snapshot(repo, source, depth=depth, batch_size=batch_size, workers=workers,
+                                   checkpoint_path=checkpoint or f"{source}.checkpoint",
+                                   collections=collections or None)
+    click.echo(f"Imported {written} records")
+    if not collections or 'help_requests' in collections:
+        click.echo(f"Indexed {repo.rebuild_help_request_index()} requests")
+
+@app.cli.command('export-ndjson')
+@click.argument('path')
+@click.argument('output', type=click.File('w'))
+@click.option('--source', type=click.Path(exists=True, dir_okay=False),
+              help='Read from this export file instead of the database.')
+@click.option('--page-size', default=500, show_default=True, help='Children read per database query.')
+def export_ndjson_command(path, output, source, page_size):
+    """Write the children of PATH to OUTPUT as newline-delimited JSON."""
+    if source:
+        count = bulk.export_ndjson_from_file(source, path, output)
+    else:
+        count = bulk.export_ndjson(repo, path, output, page_size=page_size)
+    click.echo(f"Exported {count} records", err=True)
+
+@app.cli.command('rebuild-indexes')
+def rebuild_indexes_command():
+    """Rebuild the help request index nodes from existing data."""
+    count = repo.rebuild_help_request_index()
+    click.echo(f"Indexed {count} requests")
+
 if __name__ == '__main__':
     if not os.path.exists('instance'):
         os.makedirs('instance')
@@ -0,0 +1,108 @@
+"""Time-partitioned archive of finished help requests.
+
+Finished requests end up under ``request_archive/<YYYY-MM>/<request_id>``,
+partitioned by the month they were completed. Partitions are append-only:
+archiving writes one new child and never reads or rewrites the partition,
+and the hot ``completed_requests`` nodes only keep recent work. A month
+range query reads only the partitions in range; per organization it uses
+the partitions' ``org_id`` index.
+"""
+from datetime import datetime, timezone
+
+from timestamps import record_epoch
+
+ARCHIVE_ROOT = 'request_archive'
+
+# Epoch fields tried in order to place a request in a partition
+PARTITION_FIELDS = ('completed_at', 'archived_at', 'created_at')
+
+
+def request_epoch(record):
+    """Completion time of a finished request in epoch seconds (0 when unknown)."""
+    for field in PARTITION_FIELDS:
+        epoch = record_epoch(record, field)
+        if epoch is not None:
+            return epoch
+    return 0
+
+
+def partition_key(record):
+    """``YYYY-MM`` partition for a finished request."""
+    return datetime.fromtimestamp(request_epoch(record), tz=timezone.utc).strftime('%Y-%m')
+
+
+def archive_path(request_id, record):
+    return f"{ARCHIVE_ROOT}/{partition_key(record)}/{request_id}"
+
+
+def hot_collections(repo):
+    """Paths of the unpartitioned collections that hold finished requests."""
+    paths = ['completed_requests']
+    for org_id in repo.keys('organizations'):
+        paths.append(f"organizations/{org_id}/completed_requests")
+        # Written before the archive existed; compaction drains it
+        paths.append(f"organizations/{org_id}/archived_requests")
+    return paths
+
+
+class ArchiveStore:
+    """Range queries over the archive and compaction of the hot collections."""
+
+    def __init__(self, repo):
+        self.repo = repo
+
+    def partitions(self):
+        """Existing partition keys, oldest first."""
+        return sorted(self.repo.keys(ARCHIVE_ROOT))
+
+    def query(self, start=None, end=None, org_id=None, limit=None):
+        """Archived requests completed in months ``start``..``end`` (``YYYY-MM``), newest first."""
+        months = [month for month in self.partitions()
+                  if (start is None or month >= start) and (end is None or month <= end)]
+        results = []
+        for month in reversed(months):
+            path = f"{ARCHIVE_ROOT}/{month}"
+            if org_id:
+                partition = self.repo.query(path, order_by='org_id', equal_to=org_id)
+            else:
+                partition = self.repo.get(path)
+            results.extend(sorted((partition or {}).items(), key=lambda item: request_epoch(item[1]), reverse=True))
+            # Partitions are visited newest first, so a limit can stop early
+            if limit and len(results) >= limit:
+                break
+        return dict(results[:limit] if limit else results)
+
+    def compact(self, older_than_days=30, now=None, batch_size=500):
+        """Move requests completed more than ``older_than_days`` ago into partitions.
+
+        Each source is drained in batches of ``batch_size`` via its
+        ``completed_at_ms`` index, and every batch is one multi-path update. Legacy
+        records without the epoch field sort first in that index; recent ones
+        get the field backfilled so they stop coming back. Returns the number
+        of requests moved.
+        """
+        now = now if now is not None else datetime.now(timezone.utc).timestamp()
+        cutoff = now - older_than_days * 86400
+        cutoff_ms = int(cutoff * 1000)
+        moved = 0
+        for source in hot_collections(self.repo):
+            while True:
+                batch = self.repo.query(source, order_by='completed_at_ms', end_at=cutoff_ms,
+                                        limit_to_first=batch_size) or {}
+                updates = {}
+                batch_moved = 0
+                for request_id, record in batch.items():
+                    if not isinstance(record, dict):
+                        continue
+                    if request_epoch(record) <= cutoff:
+                        updates[f"{source}/{request_id}"] = None
+                        updates[archive_path(request_id, record)] = record
+                        batch_moved += 1
+                    elif 'completed_at_ms' not in record:
+                        updates[f"{source}/{request_id}/completed_at_ms"] = int(request_epoch(record) * 1000)
+                if updates:
+                    self.repo.update_many(updates)
+                moved += batch_moved
+                if len(batch) < batch_size or not updates:
+                    break
+        return moved
@@ -0,0 +1,67 @@
+"""Benchmark the auto-assignment planner on synthetic data.
+
+    python benchmarks/bench_autoassign.py --requests 10000 --volunteers 5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from autoassign import AssignmentPlanner  # noqa: E402
+
+SKILLS = [f"skill-{i}" for i in range(60)]
+PRIORITIES = ['low', 'medium', 'high', 'urgent']
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+SLOTS = ['morning', 'afternoon', 'evening']
+
+
+def synthetic_data(request_count, volunteer_count, seed=1):
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    requests = {
+        f"req{i:06d}": {
+            'skills': rng.sample(SKILLS, rng.randint(0, 3)),
+            'priority': rng.choice(PRIORITIES),
+            'created_at': (start + timedelta(minutes=rng.randint(0, 500000))).isoformat(),
+        }
+        for i in range(request_count)
+    }
+    volunteers = {
+        f"vol{i:05d}": {
+            'skills': rng.sample(SKILLS, rng.randint(1, 5)),
+            'availability': {day: rng.sample(SLOTS, rng.randint(1, 3)) for day in rng.sample(DAYS, rng.randint(0, 4))},
+            'active_assignments': {f"a{j}": True for j in range(rng.randint(0, 2))},
+        }
+        for i in range(volunteer_count)
+    }
+    return requests, volunteers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=10000)
+    parser.add_argument('--volunteers', type=int, default=5000)
+    parser.add_argument('--max-load', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    requests, volunteers = synthetic_data(args.requests, args.volunteers)
+    planner = AssignmentPlanner(max_load=args.max_load)
+    now = datetime(2024, 6, 3, 18, tzinfo=timezone.utc)
+
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        assignments, unassigned = planner.plan(requests, volunteers, now)
+        timings.append(time.perf_counter() - started)
+    print(f"{args.requests} requests x {args.volunteers} volunteers: "
+          f"{len(assignments)} assigned, {len(unassigned)} unassigned")
+    print(f"best {min(timings) * 1000:.0f} ms, mean {sum(timings) / len(timings) * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,398 @@
+"""Load benchmark of the volunteer portal against the local database backend.
+
+Generates a synthetic dataset (volunteers, organizations, open, assigned and
+completed requests), starts the app on it with ``DATA_BACKEND=local`` and
+drives a weighted mix of dashboard, request detail, accept, create and
+assign calls through the Flask test client. Reports throughput, p50/p95/p99
+latency and database calls per route, and compares them with a stored
+baseline:
+
+    python benchmarks/bench_portal.py                    # run and compare
+    python benchmarks/bench_portal.py --save-baseline    # record a new baseline
+
+With ``--url`` the same mix is sent to a running server instead. Start it on
+the dataset written by ``--write-seed`` with ``DATA_BACKEND=local``,
+``SESSION_BACKEND=file`` and ``PROFILE_HEADER=1``, and pass the server's
+``SESSION_PATH`` as ``--session-path`` so the benchmark can log its users in.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+DEFAULT_BASELINE = os.path.join(HERE, 'baseline.json')
+DEFAULT_MIX = 'volunteer_dashboard=30,org_dashboard=15,view_request=30,accept_request=10,create_request=10,assign_request=5'
+
+SKILLS = [f"skill-{i}" for i in range(40)]
+PRIORITIES = ['low', 'medium', 'high', 'urgent']
+CITIES = ['Mumbai', 'Delhi', 'Bangalore', 'Chennai', 'Kolkata', 'Pune', 'Hyderabad', 'Ahmedabad']
+DAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+SLOTS = ['morning', 'afternoon', 'evening']
+
+
+def _stamp(field, moment):
+    return {field: moment.isoformat(), f"{field}_ms": int(moment.timestamp() * 1000)}
+
+
+def generate_dataset(volunteers=2000, orgs=50, open_requests=5000, assigned=1000, completed=2000, seed=1):
+    """A database tree in the layout of the RTDB export."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def moment():
+        return start + timedelta(minutes=rng.randint(0, 400000))
+
+    def help_request(org_id):
+        return {
+            'title': f"Request {rng.randint(0, 10 ** 6)}",
+            'description': 'Synthetic benchmark request',
+            'location': rng.choice(CITIES),
+            'priority': rng.choice(PRIORITIES),
+            'request_type': 'other',
+            'skills': rng.sample(SKILLS, rng.randint(1, 3)),
+            'status': 'active',
+            'org_id': org_id,
+            **_stamp('created_at', moment()),
+        }
+
+    users = {
+        f"vol{i:05d}": {
+            'fullName': f"Volunteer {i}",
+            'email': f"vol{i}@example.com",
+            'type': 'individual',
+            'skills': rng.sample(SKILLS, rng.randint(1, 5)),
+            'location': rng.choice(CITIES),
+            'availability': {day: rng.sample(SLOTS, rng.randint(1, 3)) for day in rng.sample(DAYS, rng.randint(1, 4))},
+        }
+        for i in range(volunteers)
+    }
+    volunteer_ids = sorted(users)
+    organizations = {
+        f"org{i:03d}": {
+            'org_name': f"Organization {i}",
+            'email': f"org{i}@example.org",
+            'type': 'organization',
+            'volunteers': {volunteer_id: {'status': 'active', 'role': 'volunteer'}
+                           for volunteer_id in rng.sample(volunteer_ids, min(len(volunteer_ids), 40))},
+            'assigned_requests': {},
+            'completed_requests': {},
+        }
+        for i in range(orgs)
+    }
+    org_ids = sorted(organizations)
+
+    help_requests = {f"req{i:06d}": help_request(rng.choice(org_ids)) for i in range(open_requests)}
+    for i in range(assigned + completed):
+        org_id = rng.choice(org_ids)
+        volunteer_id = rng.choice(sorted(organizations[org_id]['volunteers']))
+        record = dict(help_request(org_id), status='assigned', volunteer_id=volunteer_id,
+                      **_stamp('assigned_at', moment()))
+        if i < assigned:
+            organizations[org_id]['assigned_requests'][f"asg{i:06d}"] = record
+            users[volunteer_id].setdefault('active_assignments', {})[f"asg{i:06d}"] = {'request_id': f"asg{i:06d}"}
+        else:
+            record.update(status='completed', **_stamp('completed_at', moment()))
+            organizations[org_id]['completed_requests'][f"cmp{i:06d}"] = record
+    return {'users': users, 'organizations': organizations, 'help_requests': help_requests}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class Workload:
+    """Picks the parameters of each operation from the dataset, so writes stay valid."""
+
+    def __init__(self, dataset, seed):
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.volunteers = sorted(dataset['users'])
+        self.orgs = sorted(dataset['organizations'])
+        self.org_volunteers = {org_id: sorted(org['volunteers']) for org_id, org in dataset['organizations'].items()}
+        self.open_by_org = {}
+        for request_id, record in sorted(dataset['help_requests'].items()):
+            self.open_by_org.setdefault(record['org_id'], []).append(request_id)
+        self.open = sorted(dataset['help_requests'])
+        self.taken = set()
+
+    def _take_open(self, org_id=None):
+        with self.lock:
+            pool = self.open_by_org.get(org_id, []) if org_id else self.open
+            while pool:
+                request_id = pool.pop(self.rng.randrange(len(pool)))
+                # Each open request is accepted or assigned at most once
+                if request_id in self.taken:
+                    continue
+                self.taken.add(request_id)
+                return request_id
+            return None
+
+    def operation(self, name):
+        """``(user, method, path, json_body)`` for one call of ``name``."""
+        rng = self.rng
+        with self.lock:
+            volunteer = ('individual', rng.choice(self.volunteers))
+            org_id = rng.choice(self.orgs)
+            viewed = rng.choice(self.open)
+        org = ('organization', org_id)
+        if name == 'volunteer_dashboard':
+            return volunteer, 'GET', f"/volunteer-dashboard?view={rng.choice(['matches', 'all', 'urgent'])}", None
+        if name == 'org_dashboard':
+            return org, 'GET', '/org-dashboard', None
+        if name == 'view_request':
+            return volunteer, 'GET', f"/request/{viewed}", None
+        if name == 'accept_request':
+            return volunteer, 'POST', f"/accept-request/{self._take_open() or viewed}", None
+        if name == 'create_request':
+            return org, 'POST', '/create-request', {
+                'title': 'Benchmark request', 'description': 'Created by the benchmark',
+                'location': rng.choice(CITIES), 'priority': rng.choice(PRIORITIES),
+                'skills': rng.sample(SKILLS, 2),
+            }
+        if name == 'assign_request':
+            request_id = self._take_open(org_id) or viewed
+            return org, 'POST', '/assign-request', {
+                'request_id': request_id, 'volunteer_id': rng.choice(self.org_volunteers[org_id]), 'notes': '',
+            }
+        raise ValueError(f"Unknown operation: {name}")
+
+
+def session_user(user):
+    user_type, user_id = user
+    return {'localId': user_id, 'type': user_type}
+
+
+class TestClientDriver:
+    """Sends calls through the Flask test client, one client per thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self.local = threading.local()
+
+    def send(self, user, method, path, body):
+        client = self.local.__dict__.setdefault('client', self.app.test_client())
+        with client.session_transaction() as session:
+            session['user'] = session_user(user)
+        response = client.open(path, method=method, json=body, headers={'X-Profile': '1'})
+        return response.status_code, response.headers.get('Server-Timing', '')
+
+
+class HttpDriver:
+    """Sends calls to a running server, logging users in by writing their sessions to its store."""
+
+    def __init__(self, url, session_path):
+        import requests
+        from flask.sessions import session_json_serializer
+        from sessions import FileSessionStore
+        self.url = url.rstrip('/')
+        self.store = FileSessionStore(session_path, ttl=3600)
+        self.serializer = session_json_serializer
+        self.http = requests.Session()
+        self.sids = {}
+        self.lock = threading.Lock()
+
+    def _sid(self, user):
+        with self.lock:
+            sid = self.sids.get(user)
+            if sid is None:
+                import secrets
+                sid = self.sids[user] = secrets.token_urlsafe(32)
+                self.store.save(sid, self.serializer.dumps({'user': session_user(user)}).encode('utf-8'))
+            return sid
+
+    def send(self, user, method, path, body):
+        response = self.http.request(method, self.url + path, json=body, allow_redirects=False,
+                                     headers={'X-Profile': '1'}, cookies={'session': self._sid(user)})
+        return response.status_code, response.headers.get('Server-Timing', '')
+
+
+def database_calls(server_timing):
+    """Number of database calls from the ``db`` entry of a Server-Timing header."""
+    for entry in server_timing.split(','):
+        if entry.strip().startswith('db;'):
+            for part in entry.split(';'):
+                if part.strip().startswith('desc='):
+                    return int(part.split('=', 1)[1].strip('" ').split()[0])
+    return None
+
+
+def run(driver, workload, mix, operations, threads, warmup, seed):
+    rng = random.Random(seed)
+    names = list(mix)
+    plan = rng.choices(names, weights=[mix[name] for name in names], k=warmup + operations)
+    samples = {name: [] for name in names}
+    position = [0]
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                index = position[0]
+                position[0] += 1
+            if index >= len(plan):
+                return
+            name = plan[index]
+            user, method, path, body = workload.operation(name)
+            started = time.perf_counter()
+            status, timing = driver.send(user, method, path, body)
+            elapsed = time.perf_counter() - started
+            if index >= warmup:
+                with lock:
+                    samples[name].append((elapsed, status, database_calls(timing)))
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    routes = {}
+    for name, rows in samples.items():
+        if not rows:
+            continue
+        latencies = sorted(row[0] for row in rows)
+        calls = [row[2] for row in rows if row[2] is not None]
+        routes[name] = {
+            'count': len(rows),
+            'errors': sum(1 for row in rows if row[1] >= 500),
+            'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+            'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+            'db_calls': round(sum(calls) / len(calls), 2) if calls else None,
+        }
+    # Warmup calls ran inside the timed window too; count them for throughput
+    return {'throughput_rps': round(len(plan) / wall, 1), 'routes': routes}
+
+
+def compare(result, baseline, tolerance, min_delta_ms):
+    """Regressions of ``result`` against ``baseline`` as human-readable strings."""
+    problems = []
+    if result['throughput_rps'] < baseline['throughput_rps'] * (1 - tolerance):
+        problems.append(f"throughput {result['throughput_rps']} rps < baseline {baseline['throughput_rps']} rps")
+    for name, base in baseline['routes'].items():
+        current = result['routes'].get(name)
+        if current is None:
+            continue
+        if current['errors'] > base['errors']:
+            problems.append(f"{name}: {current['errors']} errors (baseline {base['errors']})")
+        for key in ('p50_ms', 'p95_ms'):
+            limit = max(base[key] * (1 + tolerance), base[key] + min_delta_ms)
+            if current[key] > limit:
+                problems.append(f"{name}: {key} {current[key]} > {limit:.3f} (baseline {base[key]})")
+        # Call counts are deterministic, so any increase is a regression
+        if base['db_calls'] is not None and current['db_calls'] is not None \
+                and current['db_calls'] > base['db_calls'] + 0.5:
+            problems.append(f"{name}: {current['db_calls']} database calls per request (baseline {base['db_calls']})")
+    return problems
+
+
+def print_report(result):
+    print(f"throughput: {result['throughput_rps']} requests/s")
+    print(f"{'route':<22}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'db calls':>10}")
+    for name, row in sorted(result['routes'].items()):
+        calls = '-' if row['db_calls'] is None else row['db_calls']
+        print(f"{name:<22}{row['count']:>7}{row['errors']:>8}{row['p50_ms']:>10}{row['p95_ms']:>10}"
+              f"{row['p99_ms']:>10}{calls:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--volunteers', type=int, default=2000)
+    parser.add_argument('--orgs', type=int, default=50)
+    parser.add_argument('--open', type=int, default=5000, help='Open help requests.')
+    parser.add_argument('--assigned', type=int, default=1000)
+    parser.add_argument('--completed', type=int, default=2000)
+    parser.add_argument('--operations', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='Comma separated operation=weight pairs.')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--url', help='Benchmark a running server instead of the test client.')
+    parser.add_argument('--session-path', help="The server's SESSION_PATH (with --url).")
+    parser.add_argument('--write-seed', help='Write the dataset to this file and exit.')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed relative slowdown.')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0, help='Latency changes below this never fail.')
+    parser.add_argument('--json', action='store_true', help='Print the result as JSON.')
+    args = parser.parse_args()
+
+    config = {key: getattr(args, key) for key in
+              ('volunteers', 'orgs', 'open', 'assigned', 'completed', 'operations', 'warmup', 'threads', 'mix', 'seed')}
+    dataset = generate_dataset(args.volunteers, args.orgs, args.open, args.assigned, args.completed, args.seed)
+    if args.write_seed:
+        with open(args.write_seed, 'w') as fh:
+            json.dump(dataset, fh)
+        print(f"Wrote dataset to {args.write_seed}")
+        return 0
+
+    if args.url:
+        if not args.session_path:
+            parser.error('--url needs --session-path')
+        driver = HttpDriver(args.url, args.session_path)
+    else:
+        seed_file = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False)
+        with seed_file:
+            json.dump(dataset, seed_file)
+        os.environ.update(DATA_BACKEND='local', LOCAL_DB_SEED=seed_file.name, LOCAL_DB_PATH='',
+                          SESSION_BACKEND='memory', PROFILE_HEADER='1', DOCUMENT_STORE='local')
+        import logging
+        logging.disable(logging.CRITICAL)
+        from app import app
+        app.logger.disabled = True
+        driver = TestClientDriver(app)
+        os.unlink(seed_file.name)
+
+    result = run(driver, Workload(dataset, args.seed), parse_mix(args.mix), args.operations,
+                 args.threads, args.warmup, args.seed)
+    result['config'] = config
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as fh:
+            json.dump(result, fh, indent=2, sort_keys=True)
+            fh.write('\n')
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare with (run with --save-baseline)")
+        return 0
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    if baseline.get('config') != config:
+        print("Baseline was recorded with different settings; not comparing")
+        return 0
+    problems = compare(result, baseline, args.tolerance, args.min_delta_ms)
+    for problem in problems:
+        print(f"REGRESSION {problem}")
+    if not problems:
+        print("No regressions against the baseline")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
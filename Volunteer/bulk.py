@@ -0,0 +1,270 @@
+"""Bulk import and export of Realtime Database snapshots.
+
+Exports from the Firebase console (the layout of
+``vision-ai-f6345-default-rtdb-export.json``) are one JSON object, often far
+too large for ``json.load``. ``iter_nodes`` parses such a file incrementally
+and yields one record at a time (by default every ``<collection>/<key>``
+child), so memory stays bounded by the largest single record.
+``import_snapshot`` writes those records back in multi-path batches from a
+few worker threads and checkpoints its progress so an interrupted import
+resumes where it stopped. ``export_ndjson`` writes a subtree as one JSON
+line per child, paging through the database by key.
+"""
+import json
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from datastore import join_path, split_path
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+WHITESPACE = ' \t\n\r'
+NUMBER_START = '-0123456789'
+NUMBER_END = WHITESPACE + ',}]'
+
+
+class _StreamParser:
+    """Incremental reader over one JSON document in a text file."""
+
+    def __init__(self, fp, chunk_size=CHUNK_SIZE):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.fp.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop what has been consumed so the buffer only holds the current record
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character without consuming it ('' at the end)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos} of the current chunk")
+        self.pos += 1
+
+    def value(self):
+        """Decode the complete JSON value at the current position."""
+        if self.peek() in NUMBER_START:
+            # A number cut at the chunk edge ("4" of "4.5") would still decode,
+            # so read on until the token is terminated
+            while not self.eof and not any(char in NUMBER_END for char in self.buf[self.pos:]):
+                self._fill()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            self.pos = end
+            return value
+
+
+def iter_nodes(fp, depth=2, chunk_size=CHUNK_SIZE):
+    """Yield ``(path, value)`` for every node ``depth`` levels below the root.
+
+    Nodes that are not objects above that depth are yielded as they are.
+    Only one such node is held in memory at a time.
+    """
+    parser = _StreamParser(fp, chunk_size)
+    if parser.peek() != '{':
+        raise ValueError("Snapshot must be a JSON object")
+
+    def walk(segments, remaining):
+        if remaining == 0 or parser.peek() != '{':
+            yield segments, parser.value()
+            return
+        parser.expect('{')
+        if parser.peek() == '}':
+            parser.pos += 1
+            return
+        while True:
+            key = parser.value()
+            if not isinstance(key, str):
+                raise ValueError("Object keys must be strings")
+            parser.expect(':')
+            yield from walk(segments + [key], remaining - 1)
+            separator = parser.peek()
+            parser.pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or '}}' after '{join_path(*segments, key)}'")
+
+    for segments, value in walk([], depth):
+        yield join_path(*segments), value
+
+
+def iter_ndjson(fp):
+    """Yield ``(path, value)`` from lines written by ``export_ndjson``."""
+    for line in fp:
+        line = line.strip()
+        if line:
+            record = json.loads(line)
+            yield record['path'], record['value']
+
+
+class Checkpoint:
+    """Number of records of one source file that are safely written."""
+
+    def __init__(self, path, source):
+        self.path = path
+        self.source = os.path.abspath(source)
+        self.size = os.path.getsize(source)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path) as fh:
+            data = json.load(fh)
+        if data.get('source') != self.source or data.get('size') != self.size:
+            raise ValueError(f"Checkpoint {self.path} belongs to a different source file")
+        return data.get('records', 0)
+
+    def save(self, records):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as fh:
+            json.dump({'source': self.source, 'size': self.size, 'records': records}, fh)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _write_batch(repo, updates, attempts=3, delay=1.0):
+    for attempt in range(1, attempts + 1):
+        try:
+            repo.update_many(updates)
+            return len(updates)
+        except Exception as e:
+            if attempt == attempts:
+                raise
+            logger.warning(f"Batch write failed (attempt {attempt}), retrying: {str(e)}")
+            time.sleep(delay * 2 ** (attempt - 1))
+
+
+def import_records(repo, records, batch_size=500, workers=4, skip=0, on_progress=None):
+    """Write ``(path, value)`` pairs in multi-path batches from ``workers`` threads.
+
+    The first ``skip`` records are passed over (they were written by an
+    earlier run). At most ``2 * workers`` batches are in flight, and batches
+    are acknowledged in order, so ``on_progress(count)`` is only ever called
+    with a count whose records are all written. Each record replaces the node
+    at its path, so re-running an import is harmless. Returns the total number
+    of records, skipped ones included.
+    """
+    done = skip
+    pending = deque()
+    batch = {}
+    skipped = 0
+
+    def acknowledge():
+        nonlocal done
+        future, count = pending.popleft()
+        future.result()
+        done += count
+        if on_progress:
+            on_progress(done)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk-import') as executor:
+        try:
+            for path, value in records:
+                if skipped < skip:
+                    skipped += 1
+                    continue
+                batch[path] = value
+                if len(batch) >= batch_size:
+                    pending.append((executor.submit(_write_batch, repo, batch), len(batch)))
+                    batch = {}
+                    while len(pending) >= 2 * workers:
+                        acknowledge()
+            if batch:
+                pending.append((executor.submit(_write_batch, repo, batch), len(batch)))
+            while pending:
+                acknowledge()
+        except BaseException:
+            for future, _ in pending:
+                future.cancel()
+            raise
+    return done
+
+
+def import_snapshot(repo, source, depth=2, batch_size=500, workers=4, checkpoint_path=None,
+                    collections=None):
+    """Import a snapshot file (JSON export or ``.ndjson``) into ``repo``.
+
+    ``collections`` limits the import to those top-level keys. With
+    ``checkpoint_path`` progress is saved after every acknowledged batch and
+    a later call with the same file resumes from it; the checkpoint is
+    removed once the import completes. Returns the number of records written.
+    """
+    checkpoint = Checkpoint(checkpoint_path, source) if checkpoint_path else None
+    skip = checkpoint.load() if checkpoint else 0
+    if skip:
+        logger.info(f"Resuming import of {source} after {skip} records")
+
+    with open(source, encoding='utf-8') as fh:
+        if source.endswith('.ndjson'):
+            records = iter_ndjson(fh)
+        else:
+            records = iter_nodes(fh, depth=depth)
+        if collections:
+            wanted = set(collections)
+            records = ((path, value) for path, value in records if split_path(path)[0] in wanted)
+        total = import_records(repo, records, batch_size=batch_size, workers=workers, skip=skip,
+                               on_progress=checkpoint.save if checkpoint else None)
+
+    if checkpoint:
+        checkpoint.clear()
+    return total - skip
+
+
+def export_ndjson(repo, path, out, page_size=500):
+    """Write each child of ``path`` as a ``{"path", "value"}`` line to ``out``.
+
+    The subtree is read one page of ``page_size`` children at a time. Returns
+    the number of lines written.
+    """
+    count = 0
+    cursor = None
+    while True:
+        children, cursor = repo.page(path, '$key', page_size, cursor, descending=False)
+        for key, value in children.items():
+            out.write(json.dumps({'path': join_path(path, key), 'value': value}) + '\n')
+            count += 1
+        if not cursor:
+            return count
+
+
+def export_ndjson_from_file(source, path, out):
+    """Like ``export_ndjson``, reading the subtree from a snapshot file instead."""
+    segments = split_path(path)
+    count = 0
+    with open(source, encoding='utf-8') as fh:
+        for node_path, value in iter_nodes(fh, depth=len(segments) + 1):
+            if split_path(node_path)[:len(segments)] == segments:
+                out.write(json.dumps({'path': node_path, 'value': value}) + '\n')
+                count += 1
+    return count
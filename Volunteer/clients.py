@@ -0,0 +1,91 @@
+"""Lazily created, per-process Firebase clients."""
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class FirebaseClients:
+    """Builds the Admin SDK app and the Pyrebase clients on first use.
+
+    Nothing is imported, read from disk or connected at import time, so
+    workers boot quickly. Every client is tied to the process that created
+    it: after a fork (gunicorn ``--preload``) the next access builds fresh
+    clients in the worker instead of sharing the parent's connections.
+    """
+
+    def __init__(self, credentials_path, admin_options, client_config, session_factory=None):
+        self.credentials_path = credentials_path
+        self.admin_options = admin_options
+        self.client_config = client_config
+        self.session_factory = session_factory
+        self._lock = threading.Lock()
+        self._admin_pid = None
+        self._client_pid = None
+        self._admin_app = None
+        self._firebase = None
+        self._auth = None
+        self._storage = None
+
+    def _ensure_admin(self):
+        with self._lock:
+            if self._admin_pid == os.getpid():
+                return
+            import firebase_admin
+            from firebase_admin import credentials
+
+            if self._admin_app is not None:
+                # Inherited from the parent process: drop it and start over
+                firebase_admin.delete_app(self._admin_app)
+            logger.debug("Initializing Firebase Admin SDK...")
+            self._admin_app = firebase_admin.initialize_app(
+                credentials.Certificate(self.credentials_path), self.admin_options)
+            self._admin_pid = os.getpid()
+
+    def _ensure_client(self):
+        with self._lock:
+            if self._client_pid == os.getpid():
+                return
+            import pyrebase
+
+            logger.debug("Initializing Pyrebase...")
+            firebase = pyrebase.initialize_app(self.client_config)
+            if self.session_factory is not None:
+                firebase.requests = self.session_factory()
+            self._firebase = firebase
+            self._auth = firebase.auth()
+            self._storage = firebase.storage()
+            self._client_pid = os.getpid()
+            logger.info("Pyrebase initialized successfully!")
+
+    @property
+    def admin_auth(self):
+        """``firebase_admin.auth``, with the default app initialized in this process."""
+        self._ensure_admin()
+        from firebase_admin import auth
+        return auth
+
+    @property
+    def client_ready(self):
+        """Whether the Pyrebase clients exist in this process (accessing them would build them)."""
+        return self._client_pid == os.getpid()
+
+    @property
+    def firebase(self):
+        self._ensure_client()
+        return self._firebase
+
+    @property
+    def auth(self):
+        self._ensure_client()
+        return self._auth
+
+    @property
+    def storage(self):
+        self._ensure_client()
+        return self._storage
+
+    def database(self):
+        """A fresh Pyrebase database handle (the repository's connect factory)."""
+        return self.firebase.database()
@@ -0,0 +1,691 @@
+"""Data-access layer for the volunteer portal.
+
+Routes talk to a ``Repository`` instead of the module-level Pyrebase client.
+The repository wraps either the live Firebase Realtime Database (through
+Pyrebase) or ``LocalDatabase``, an in-process stand-in that speaks the same
+``child().get()/set()/update()/push()/remove()`` dialect and can be seeded from
+an RTDB JSON export. The stand-in is what we benchmark and load test against.
+"""
+import base64
+import copy
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+from archive import ARCHIVE_ROOT
+from indexes import INDEX_ROOT, build_index, index_path, index_updates
+
+logger = logging.getLogger(__name__)
+
+# Top-level collections whose records are served through the profile cache
+PROFILE_COLLECTIONS = ('users', 'organizations')
+
+PUSH_CHARS = '-0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz'
+
+
+def split_path(path):
+    """Split a slash separated database path into its segments."""
+    return [segment for segment in str(path).split('/') if segment]
+
+
+def join_path(*parts):
+    """Join path fragments, ignoring empty ones."""
+    return '/'.join(segment for part in parts for segment in split_path(part))
+
+
+def increment(delta=1):
+    """Server value that atomically adds ``delta`` to a numeric node."""
+    return {'.sv': {'increment': delta}}
+
+
+SERVER_TIMESTAMP = {'.sv': 'timestamp'}
+
+
+def _is_server_value(value):
+    return isinstance(value, dict) and len(value) == 1 and '.sv' in value
+
+
+def _normalize(value):
+    """Mirror RTDB storage rules: nulls and empty containers are not stored."""
+    if isinstance(value, dict):
+        cleaned = {}
+        for key, child in value.items():
+            child = _normalize(child)
+            if child is not None:
+                cleaned[str(key)] = child
+        return cleaned or None
+    if isinstance(value, (list, tuple)):
+        cleaned = [_normalize(child) for child in value]
+        return cleaned if any(child is not None for child in cleaned) else None
+    return value
+
+
+class LocalResponse:
+    """Minimal stand-in for Pyrebase's ``PyreResponse``."""
+
+    def __init__(self, value, key):
+        self._value = value
+        self._key = key
+
+    def val(self):
+        return self._value
+
+    def key(self):
+        return self._key
+
+    def each(self):
+        if isinstance(self._value, dict):
+            return [LocalResponse(value, key) for key, value in self._value.items()]
+        return None
+
+
+class LocalReference:
+    """Immutable reference into a ``LocalDatabase``, Pyrebase style."""
+
+    def __init__(self, database, path='', query=None):
+        self._database = database
+        self.path = path
+        self._query = query or {}
+
+    def child(self, *args):
+        return LocalReference(self._database, join_path(self.path, *[str(arg) for arg in args]), self._query)
+
+    def _with(self, **params):
+        return LocalReference(self._database, self.path, dict(self._query, **params))
+
+    # Query builders, named after Pyrebase's
+    def order_by_key(self):
+        return self._with(orderBy='$key')
+
+    def order_by_value(self):
+        return self._with(orderBy='$value')
+
+    def order_by_child(self, order):
+        return self._with(orderBy=order)
+
+    def start_at(self, start):
+        return self._with(startAt=start)
+
+    def end_at(self, end):
+        return self._with(endAt=end)
+
+    def equal_to(self, equal):
+        return self._with(equalTo=equal)
+
+    def limit_to_first(self, limit_first):
+        return self._with(limitToFirst=limit_first)
+
+    def limit_to_last(self, limit_last):
+        return self._with(limitToLast=limit_last)
+
+    def shallow(self):
+        return self._with(shallow=True)
+
+    def get(self):
+        key = split_path(self.path)[-1] if self.path else None
+        if self._query:
+            return LocalResponse(self._database.query(self.path, self._query), key)
+        return LocalResponse(self._database.read(self.path), key)
+
+    def set(self, data):
+        self._database.write(self.path, data)
+        return data
+
+    def update(self, data):
+        self._database.write_many(self.path, data)
+        return data
+
+    def push(self, data):
+        key = self._database.generate_key()
+        self._database.write(join_path(self.path, key), data)
+        return {'name': key}
+
+    def remove(self):
+        self._database.write(self.path, None)
+        return None
+
+
+def child_value(key, value, order_by):
+    """Return the value a child is ordered by ('$key', '$value' or a child path)."""
+    if order_by == '$key':
+        return key
+    if order_by == '$value':
+        return value
+    for segment in split_path(order_by):
+        value = value.get(segment) if isinstance(value, dict) else None
+    return value
+
+
+def encode_cursor(value, key):
+    """Encode a (value, key) position as an opaque, URL-safe page cursor."""
+    raw = json.dumps([value, key], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor made by ``encode_cursor``; raises ValueError if malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, key = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError(f"Invalid page cursor: {cursor!r}")
+    return value, key
+
+
+def order_key(value):
+    """Sort key following RTDB ordering: null, false, true, numbers, strings, objects."""
+    if value is None:
+        return (0,)
+    if value is False:
+        return (1,)
+    if value is True:
+        return (2,)
+    if isinstance(value, (int, float)):
+        return (3, value)
+    if isinstance(value, str):
+        return (4, value)
+    return (5,)
+
+
+def run_query(children, params):
+    """Apply RTDB query parameters to a dict of children, returning a new dict."""
+    if params.get('shallow'):
+        return {key: True for key in children}
+
+    order_by = params.get('orderBy', '$key')
+    items = [(order_key(child_value(key, value, order_by)), key, value) for key, value in children.items()]
+    if 'equalTo' in params:
+        target = order_key(params['equalTo'])
+        items = [item for item in items if item[0] == target]
+    if 'startAt' in params:
+        start = order_key(params['startAt'])
+        items = [item for item in items if item[0] >= start]
+    if 'endAt' in params:
+        end = order_key(params['endAt'])
+        items = [item for item in items if item[0] <= end]
+    items.sort(key=lambda item: (item[0], item[1]))
+
+    if 'limitToFirst' in params:
+        items = items[:params['limitToFirst']]
+    if 'limitToLast' in params:
+        items = items[-params['limitToLast']:] if params['limitToLast'] else []
+    return {key: value for _, key, value in items}
+
+
+class LocalDatabase:
+    """In-memory Realtime Database tree, optionally persisted to a JSON file."""
+
+    def __init__(self, path=None, seed_path=None, autosave=True):
+        self.path = path
+        self.autosave = autosave and bool(path)
+        self._lock = threading.RLock()
+        self._last_push_time = 0
+        self._last_rand_chars = []
+
+        if path and os.path.exists(path):
+            self._root = self._load(path)
+        elif seed_path and os.path.exists(seed_path):
+            self._root = self._load(seed_path)
+            logger.info(f"Local database seeded from {seed_path}")
+        else:
+            self._root = {}
+
+    @staticmethod
+    def _load(path):
+        with open(path, 'r', encoding='utf-8') as fh:
+            return _normalize(json.load(fh)) or {}
+
+    def child(self, *args):
+        return LocalReference(self).child(*args)
+
+    def read(self, path):
+        """Return a deep copy of the value stored at ``path`` (or None)."""
+        with self._lock:
+            node = self._root
+            for segment in split_path(path):
+                if isinstance(node, dict):
+                    node = node.get(segment)
+                elif isinstance(node, list) and segment.isdigit() and int(segment) < len(node):
+                    node = node[int(segment)]
+                else:
+                    return None
+                if node is None:
+                    return None
+            return copy.deepcopy(node)
+
+    def query(self, path, params):
+        """Run an RTDB style query against the children of ``path``."""
+        with self._lock:
+            node = self._root
+            for segment in split_path(path):
+                node = node.get(segment) if isinstance(node, dict) else None
+            if not isinstance(node, dict):
+                return None
+            return copy.deepcopy(run_query(node, params)) or None
+
+    def write(self, path, value):
+        """Replace the value at ``path``; ``None`` removes it."""
+        with self._lock:
+            segments = split_path(path)
+            self._write(segments, self._resolve(segments, value))
+            self._persist()
+
+    def write_many(self, path, values):
+        """Apply a (possibly multi-path) update relative to ``path`` atomically."""
+        with self._lock:
+            base = split_path(path)
+            for key, value in values.items():
+                segments = base + split_path(key)
+                self._write(segments, self._resolve(segments, value))
+            self._persist()
+
+    def _resolve(self, segments, value):
+        """Copy ``value`` for storage, evaluating any server values against current data."""
+        if _is_server_value(value):
+            server_value = value['.sv']
+            if server_value == 'timestamp':
+                return int(time.time() * 1000)
+            if isinstance(server_value, dict) and 'increment' in server_value:
+                current = self.read('/'.join(segments))
+                if isinstance(current, bool) or not isinstance(current, (int, float)):
+                    current = 0
+                return current + server_value['increment']
+            raise ValueError(f"Unsupported server value: {server_value!r}")
+        if isinstance(value, dict):
+            return _normalize({key: self._resolve(segments + [str(key)], child) for key, child in value.items()})
+        return _normalize(copy.deepcopy(value))
+
+    def _write(self, segments, value):
+        if not segments:
+            self._root = value if isinstance(value, dict) else {}
+            return
+
+        # Walk down, creating intermediate objects as needed
+        parents = []
+        node = self._root
+        for segment in segments[:-1]:
+            child = node.get(segment) if isinstance(node, dict) else None
+            if not isinstance(child, dict):
+                if value is None:
+                    return
+                child = {}
+                node[segment] = child
+            parents.append((node, segment))
+            node = child
+
+        if value is None:
+            node.pop(segments[-1], None)
+        else:
+            node[segments[-1]] = value
+
+        # Empty objects do not exist in the RTDB, so prune them bottom-up
+        while parents and not node:
+            parent, segment = parents.pop()
+            parent.pop(segment, None)
+            node = parent
+
+    def _persist(self):
+        if self.autosave:
+            self.save()
+
+    def save(self, path=None):
+        """Atomically write the whole tree to ``path`` (or the configured file)."""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as fh:
+                json.dump(self._root, fh)
+            os.replace(tmp_path, path)
+
+    def generate_key(self):
+        """Generate a chronologically ordered, Firebase style push ID."""
+        with self._lock:
+            now = int(time.time() * 1000)
+            duplicate_time = now == self._last_push_time
+            self._last_push_time = now
+
+            time_stamp_chars = []
+            for _ in range(8):
+                time_stamp_chars.append(PUSH_CHARS[now % 64])
+                now //= 64
+            new_id = ''.join(reversed(time_stamp_chars))
+
+            if not duplicate_time:
+                self._last_rand_chars = [random.randrange(64) for _ in range(12)]
+            else:
+                for i in range(11, -1, -1):
+                    if self._last_rand_chars[i] != 63:
+                        break
+                    self._last_rand_chars[i] = 0
+                self._last_rand_chars[i] += 1
+
+            return new_id + ''.join(PUSH_CHARS[c] for c in self._last_rand_chars)
+
+
+class Repository:
+    """Single entry point for every database read and write the app makes.
+
+    ``connect`` returns a root database handle. Pyrebase's ``Database`` keeps
+    the current path as mutable state, so for Firebase we hand out a fresh
+    handle per call instead of sharing one across threads.
+
+    ``profile_cache`` (a ``cache.TTLCache``) makes ``users/<uid>`` and
+    ``organizations/<uid>`` reads read-through; every write made through the
+    repository invalidates the records it touches.
+
+    ``instrument`` (e.g. ``metrics.AppMetrics``), when set, wraps every
+    database round trip in ``instrument.call(op, path)``.
+    """
+
+    def __init__(self, connect, profile_cache=None):
+        self._connect = connect
+        self.profile_cache = profile_cache
+        self.instrument = None
+        self._listeners = []
+
+    def subscribe(self, listener):
+        """Call ``listener(path, value)`` for every path this repository writes.
+
+        ``value`` is None for removals. In-process indexes use this to stay in
+        sync with the app's own writes.
+        """
+        self._listeners.append(listener)
+
+    def _written(self, path, value):
+        self._invalidate(path)
+        for listener in self._listeners:
+            try:
+                listener(path, value)
+            except Exception as e:
+                logger.error(f"Write listener failed for {path}: {str(e)}")
+
+    def ref(self, path=''):
+        return self._connect().child(join_path(path))
+
+    def _call(self, op, path, run):
+        if self.instrument is None:
+            return run()
+        with self.instrument.call(op, path):
+            return run()
+
+    def generate_key(self):
+        """Generate a push ID locally, so it can be used inside a multi-path update."""
+        return self._connect().generate_key()
+
+    # Generic path operations
+    def get(self, path):
+        return self._call('get', path, lambda: self.ref(path).get().val())
+
+    def set(self, path, value):
+        self._call('set', path, lambda: self.ref(path).set(value))
+        self._written(join_path(path), value)
+
+    def update(self, path, values):
+        self._call('update', path, lambda: self.ref(path).update(values))
+        for key, value in values.items():
+            self._written(join_path(path, key), value)
+
+    def push(self, path, value):
+        key = self._call('push', path, lambda: self.ref(path).push(value))['name']
+        self._written(join_path(path, key), value)
+        return key
+
+    def remove(self, path):
+        self._call('remove', path, lambda: self.ref(path).remove())
+        self._written(join_path(path), None)
+
+    def update_many(self, values):
+        """Apply a multi-path update from the root in a single atomic write."""
+        self.update('', values)
+
+    def increment(self, path, delta=1):
+        """Atomically add ``delta`` to the number at ``path`` on the server."""
+        self.set(path, increment(delta))
+
+    def keys(self, path):
+        """Child keys of ``path`` without transferring their values."""
+        return list(self._call('keys', path, lambda: self.ref(path).shallow().get().val()) or [])
+
+    # Queries
+    def query(self, path, order_by='$key', equal_to=None, start_at=None, end_at=None,
+              limit_to_first=None, limit_to_last=None):
+        """Run an ordered, filtered query and return the matching children in order."""
+        ref = self.ref(path)
+        if order_by == '$key':
+            ref = ref.order_by_key()
+        elif order_by == '$value':
+            ref = ref.order_by_value()
+        else:
+            ref = ref.order_by_child(order_by)
+        if equal_to is not None:
+            ref = ref.equal_to(equal_to)
+        if start_at is not None:
+            ref = ref.start_at(start_at)
+        if end_at is not None:
+            ref = ref.end_at(end_at)
+        if limit_to_first is not None:
+            ref = ref.limit_to_first(limit_to_first)
+        if limit_to_last is not None:
+            ref = ref.limit_to_last(limit_to_last)
+        return dict(self._call('query', path, lambda: ref.get().val()) or {})
+
+    def page(self, path, order_by, limit, cursor=None, descending=True):
+        """Return ``(children, next_cursor)`` for one page of an ordered collection.
+
+        Only ``limit`` (plus a little slack for the cursor row) children are
+        transferred, however large the collection is. ``next_cursor`` is None on
+        the last page.
+        """
+        position = decode_cursor(cursor) if cursor else None
+        fetch = limit + (2 if position else 1)
+        while True:
+            if descending:
+                children = self.query(path, order_by=order_by, limit_to_last=fetch,
+                                      end_at=position[0] if position else None)
+                items = sorted(children.items(), reverse=True,
+                               key=lambda item: (order_key(child_value(item[0], item[1], order_by)), item[0]))
+            else:
+                children = self.query(path, order_by=order_by, limit_to_first=fetch,
+                                      start_at=position[0] if position else None)
+                items = list(children.items())
+
+            if position:
+                # Drop rows at or before the cursor (ties on the ordered value included)
+                boundary = (order_key(position[0]), position[1])
+
+                def is_after(item):
+                    current = (order_key(child_value(item[0], item[1], order_by)), item[0])
+                    return current < boundary if descending else current > boundary
+                items = [item for item in items if is_after(item)]
+
+            # Rows tied with the cursor ate the slack; widen the window and retry
+            if len(items) > limit or len(children) < fetch:
+                break
+            fetch *= 2
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last_key, last_value = items[-1]
+            next_cursor = encode_cursor(child_value(last_key, last_value, order_by), last_key)
+        return dict(items), next_cursor
+
+    # Profile cache
+    def _get_profile(self, path):
+        if self.profile_cache is None:
+            return self.get(path)
+        value = self.profile_cache.get_or_load(path, lambda: self.get(path))
+        # Routes mutate what they read, so never hand out the cached object itself
+        return copy.deepcopy(value)
+
+    def _invalidate(self, path):
+        if self.profile_cache is None:
+            return
+        segments = split_path(path)
+        if not segments:
+            self.profile_cache.clear()
+        elif segments[0] in PROFILE_COLLECTIONS:
+            if len(segments) == 1:
+                self.profile_cache.invalidate_prefix(f"{segments[0]}/")
+            else:
+                self.profile_cache.invalidate(f"{segments[0]}/{segments[1]}")
+
+    # Users
+    def get_user(self, user_id):
+        return self._get_profile(f"users/{user_id}")
+
+    def set_user(self, user_id, data):
+        self.set(f"users/{user_id}", data)
+
+    def update_user(self, user_id, values):
+        self.update(f"users/{user_id}", values)
+
+    # Organizations
+    def get_organization(self, org_id):
+        return self._get_profile(f"organizations/{org_id}")
+
+    def set_organization(self, org_id, data):
+        self.set(f"organizations/{org_id}", data)
+
+    def update_organization(self, org_id, values):
+        self.update(f"organizations/{org_id}", values)
+
+    # Help requests
+    def get_help_request(self, request_id):
+        return self.get(f"help_requests/{request_id}")
+
+    def get_help_requests(self):
+        return self.get("help_requests") or {}
+
+    def get_help_requests_by(self, field, value, limit=None):
+        """Help requests whose ``field`` equals ``value`` (needs an .indexOn rule)."""
+        return self.query("help_requests", order_by=field, equal_to=value, limit_to_first=limit)
+
+    def get_help_requests_page(self, limit, cursor=None, order_by='created_at'):
+        """One page of help requests, newest first."""
+        return self.page("help_requests", order_by, limit, cursor=cursor, descending=True)
+
+    def create_help_request(self, data):
+        """Create a help request and its index entries in one write."""
+        request_id = self.generate_key()
+        updates = {f"help_requests/{request_id}": data}
+        updates.update(index_updates(request_id, None, data))
+        self.update_many(updates)
+        return request_id
+
+    def create_help_requests(self, records):
+        """Create several help requests and their index entries in one write; returns their IDs."""
+        request_ids = []
+        updates = {}
+        for data in records:
+            request_id = self.generate_key()
+            updates[f"help_requests/{request_id}"] = data
+            updates.update(index_updates(request_id, None, data))
+            request_ids.append(request_id)
+        if updates:
+            self.update_many(updates)
+        return request_ids
+
+    # Help request indexes
+    def get_help_request_ids(self, field, value):
+        """IDs of requests whose indexed ``field`` equals ``value``."""
+        return self.keys(index_path(field, value))
+
+    def count_help_requests(self, field, value):
+        return len(self.get_help_request_ids(field, value))
+
+    def rebuild_help_request_index(self):
+        """Rebuild every index node from the request collections."""
+        records = list((self.get("help_requests") or {}).items())
+        records += list((self.get("assigned_requests") or {}).items())
+        records += list((self.get("completed_requests") or {}).items())
+        for org_id in self.keys("organizations"):
+            for collection in ("assigned_requests", "completed_requests", "archived_requests"):
+                records += list((self.get(f"organizations/{org_id}/{collection}") or {}).items())
+        for month in self.keys(ARCHIVE_ROOT):
+            records += list((self.get(f"{ARCHIVE_ROOT}/{month}") or {}).items())
+        self.set(INDEX_ROOT, build_index(records))
+        return len(records)
+
+
+class CounterBatcher:
+    """Coalesces high-frequency counter bumps into periodic multi-path increments.
+
+    ``add()`` only touches memory; a daemon thread (started lazily, so it is
+    created in the worker process rather than before a fork) flushes the
+    accumulated deltas every ``interval`` seconds as one update of
+    server-side increments. Call ``flush()`` to write pending deltas now.
+    """
+
+    def __init__(self, repo, interval=5.0, max_pending=1000):
+        self.repo = repo
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopped = threading.Event()
+
+    def add(self, path, delta=1):
+        with self._lock:
+            self._pending[path] = self._pending.get(path, 0) + delta
+            should_flush = len(self._pending) >= self.max_pending
+        self._ensure_thread()
+        if should_flush:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        try:
+            self.repo.update_many({path: increment(delta) for path, delta in pending.items() if delta})
+        except Exception as e:
+            logger.error(f"Counter flush failed, keeping {len(pending)} deltas: {str(e)}")
+            with self._lock:
+                for path, delta in pending.items():
+                    self._pending[path] = self._pending.get(path, 0) + delta
+            return 0
+        return len(pending)
+
+    def stop(self):
+        self._stopped.set()
+        self.flush()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='counter-batcher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.flush()
+
+
+def create_repository(backend='firebase', firebase=None, local_path=None, seed_path=None,
+                      profile_cache=None):
+    """Build the repository for the configured backend ('firebase' or 'local')."""
+    if backend == 'local':
+        database = LocalDatabase(path=local_path, seed_path=seed_path)
+        logger.info("Using in-process local database")
+        repository = Repository(lambda: database, profile_cache=profile_cache)
+        if database.read(INDEX_ROOT) is None:
+            repository.rebuild_help_request_index()
+        return repository
+    if backend == 'firebase':
+        if firebase is None:
+            raise ValueError("A Pyrebase app is required for the firebase backend")
+        return Repository(firebase.database, profile_cache=profile_cache)
+    raise ValueError(f"Unknown data backend: {backend}")
@@ -0,0 +1,152 @@
+"""Uploaded document storage.
+
+Uploads are streamed from the request in fixed-size chunks straight to the
+storage backend, with a size limit and a SHA-256 of the content. Nothing is
+written to ``instance/`` on the way, so a failed upload leaves no files
+behind. With ``dedup`` the object is named after its hash and an identical
+document that is already stored is reused instead of uploaded again.
+"""
+import hashlib
+import os
+import uuid
+from urllib.parse import quote
+
+from werkzeug.utils import secure_filename
+
+CHUNK_SIZE = 256 * 1024
+
+
+class DocumentTooLarge(ValueError):
+    pass
+
+
+class LocalDocumentStore:
+    """Stores documents under a directory on the local filesystem (development and tests)."""
+
+    def __init__(self, root, url_prefix='/documents'):
+        self.root = root
+        self.url_prefix = url_prefix
+
+    def _full_path(self, name):
+        full_path = os.path.abspath(os.path.join(self.root, name))
+        if not full_path.startswith(os.path.abspath(self.root) + os.sep):
+            raise ValueError(f"Invalid document name: {name}")
+        return full_path
+
+    def exists(self, name):
+        return os.path.isfile(self._full_path(name))
+
+    def put_stream(self, name, chunks, content_type=None):
+        full_path = self._full_path(name)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        # Write to a temporary file first so a failed upload never leaves a partial document
+        tmp_path = f"{full_path}.{uuid.uuid4().hex}.part"
+        try:
+            with open(tmp_path, 'wb') as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+            os.replace(tmp_path, full_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def delete(self, name):
+        try:
+            os.remove(self._full_path(name))
+        except FileNotFoundError:
+            pass
+
+    def url(self, name):
+        return f"{self.url_prefix}/{quote(name)}"
+
+
+class FirebaseDocumentStore:
+    """Firebase Storage through its REST API, sharing the Pyrebase HTTP session."""
+
+    def __init__(self, clients):
+        self.clients = clients
+
+    def _object_url(self, name):
+        return f"{self.clients.storage.storage_bucket}/o/{quote(name, safe='')}"
+
+    def exists(self, name):
+        response = self.clients.firebase.requests.get(self._object_url(name))
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+        return True
+
+    def put_stream(self, name, chunks, content_type=None):
+        headers = {'Content-Type': content_type or 'application/octet-stream'}
+        # A generator body is sent with chunked transfer encoding, so the
+        # document is never held in memory as a whole
+        response = self.clients.firebase.requests.post(
+            f"{self.clients.storage.storage_bucket}/o?name={quote(name, safe='')}",
+            headers=headers, data=chunks)
+        response.raise_for_status()
+
+    def delete(self, name):
+        response = self.clients.firebase.requests.delete(self._object_url(name))
+        if response.status_code != 404:
+            response.raise_for_status()
+
+    def url(self, name):
+        # Same public URL format Pyrebase's get_url(None) produced
+        return f"{self._object_url(name)}?alt=media"
+
+
+def _read_chunks(stream, max_bytes, digest):
+    total = 0
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        total += len(chunk)
+        if total > max_bytes:
+            raise DocumentTooLarge(f"Document is larger than {max_bytes // (1024 * 1024)} MB")
+        digest.update(chunk)
+        yield chunk
+
+
+def _stream_size(stream):
+    """Size of a seekable upload stream, or None."""
+    try:
+        position = stream.tell()
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell() - position
+        stream.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def store_upload(store, upload, prefix, max_bytes, dedup=False):
+    """Stream a Werkzeug ``FileStorage`` into ``store`` under ``prefix/``.
+
+    Returns ``{'name', 'url', 'sha256', 'size', 'reused'}``. Raises
+    ``DocumentTooLarge`` when the upload exceeds ``max_bytes``.
+    """
+    stream = upload.stream
+    size = _stream_size(stream)
+    if size is not None and size > max_bytes:
+        raise DocumentTooLarge(f"Document is larger than {max_bytes // (1024 * 1024)} MB")
+
+    filename = secure_filename(upload.filename or '') or 'document'
+    digest = hashlib.sha256()
+    if dedup:
+        # Hash first (the upload is already spooled locally), then skip the
+        # upload entirely if this exact document is stored
+        for _ in _read_chunks(stream, max_bytes, digest):
+            pass
+        stream.seek(0)
+        sha256 = digest.hexdigest()
+        extension = os.path.splitext(filename)[1].lower()
+        name = f"{prefix}/{sha256}{extension}"
+        if store.exists(name):
+            return {'name': name, 'url': store.url(name), 'sha256': sha256, 'size': size, 'reused': True}
+        digest = hashlib.sha256()
+    else:
+        name = f"{prefix}/{uuid.uuid4()}_{filename}"
+
+    store.put_stream(name, _read_chunks(stream, max_bytes, digest), content_type=upload.mimetype)
+    return {'name': name, 'url': store.url(name), 'sha256': digest.hexdigest(), 'size': size, 'reused': False}
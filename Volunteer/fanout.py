@@ -0,0 +1,88 @@
+"""Run independent Firebase calls concurrently on a shared thread pool."""
+import contextvars
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+_local = threading.local()
+
+
+class FanOut:
+    """Shared worker pool for blocking database/auth calls.
+
+    ``gather`` runs a handful of independent calls at once, so a route waits
+    for its slowest call instead of the sum of all of them. At most
+    ``max_concurrency`` calls of one ``gather`` are in flight at a time, which
+    keeps a single request from taking over the pool. Calls run with a copy of
+    the caller's context, so Flask's ``request``/``session`` stay usable.
+    """
+
+    def __init__(self, max_workers=16, max_concurrency=4):
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        # Created lazily and per process: a pool inherited through fork has no threads
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='fanout',
+                                                    initializer=_mark_worker)
+                self._pid = os.getpid()
+            return self._executor
+
+    def gather(self, *calls, return_exceptions=False, max_concurrency=None):
+        """Call each zero-argument callable and return their results in order.
+
+        With ``return_exceptions`` a failed call's exception is returned in
+        its slot; otherwise the first failure (in argument order) is raised
+        once every call has finished.
+        """
+        limit = max(1, max_concurrency or self.max_concurrency)
+        if len(calls) <= 1 or limit == 1 or getattr(_local, 'worker', False):
+            # Nothing to overlap, or already on a pool thread (avoid pool deadlock)
+            results = [_capture(call) for call in calls]
+        else:
+            pool = self._pool()
+            results = [None] * len(calls)
+            pending = {}
+            queue = iter(enumerate(calls))
+            for index, call in queue:
+                pending[pool.submit(contextvars.copy_context().run, _capture, call)] = index
+                if len(pending) >= limit:
+                    break
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[pending.pop(future)] = future.result()
+                for index, call in queue:
+                    pending[pool.submit(contextvars.copy_context().run, _capture, call)] = index
+                    if len(pending) >= limit:
+                        break
+
+        values = []
+        for ok, value in results:
+            if not ok and not return_exceptions:
+                raise value
+            values.append(value)
+        return values
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def _mark_worker():
+    _local.worker = True
+
+
+def _capture(call):
+    try:
+        return True, call()
+    except Exception as e:
+        return False, e
@@ -0,0 +1,215 @@
+"""Live feed of help request changes, shared by all dashboard connections.
+
+Each worker keeps one copy of the open ``help_requests`` queue and one
+upstream change subscription. The copy starts from the worker's shared
+``indexes.SnapshotLoader``, which also passes on this process's own writes
+and periodic refreshes; on the Firebase backend a Realtime Database stream
+adds everyone else's changes as they happen. Every change is diffed against
+the copy and handed to each connected client whose filter matches it, as an
+``add``, ``change`` or ``remove`` event. So N open dashboards cost one
+upstream stream instead of N snapshots of the whole tree.
+"""
+import copy
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from datastore import split_path
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = 'help_requests'
+
+
+class _StreamClosed(Exception):
+    pass
+
+
+def format_event(kind, data, event_id=None):
+    """Encode one server-sent event."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {kind}")
+    lines.append(f"data: {json.dumps(data)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+class Subscription:
+    """One connected client: a filter and a bounded queue of pending events."""
+
+    def __init__(self, predicate, maxsize):
+        self.predicate = predicate
+        self._queue = queue.Queue(maxsize)
+        self.overflowed = False
+
+    def offer(self, event_id, request_id, before, after):
+        was_visible = before is not None and self.predicate(before)
+        is_visible = after is not None and self.predicate(after)
+        if not was_visible and not is_visible:
+            return
+        if not is_visible:
+            kind, record = 'remove', None
+        elif not was_visible:
+            kind, record = 'add', after
+        else:
+            kind, record = 'change', after
+        try:
+            self._queue.put_nowait(format_event(kind, {'id': request_id, 'request': record}, event_id))
+        except queue.Full:
+            # The client is not keeping up; it will be told to reload
+            self.overflowed = True
+
+    def next_message(self, timeout):
+        """The next encoded event, a ``reset`` after an overflow, or None on timeout."""
+        if self.overflowed:
+            return format_event('reset', {})
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class RequestFeed:
+    """Fans one upstream ``help_requests`` subscription out to many clients.
+
+    The upstream subscription is opened when the first client connects and
+    closed when the last one leaves. A client whose queue fills up gets a
+    ``reset`` event and is expected to reload and reconnect.
+    """
+
+    def __init__(self, loader, queue_size=100, reconnect_delay=5):
+        self.loader = loader
+        self.repo = loader.repo
+        self.queue_size = queue_size
+        self.reconnect_delay = reconnect_delay
+        self._lock = threading.RLock()
+        self._subscribers = set()
+        self._state = None
+        self._pid = None
+        self._generation = 0
+        self._ids = itertools.count(1)
+        loader.register(self)
+
+    def subscribe(self, predicate):
+        subscription = Subscription(predicate, self.queue_size)
+        self._start()
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+            if not self._subscribers:
+                # Drop the snapshot and let the upstream thread wind down
+                self._state = None
+                self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'requests': len(self._state or {}),
+                'streaming': self._state is not None,
+            }
+
+    def _start(self):
+        with self._lock:
+            if self._state is not None and self._pid == os.getpid():
+                return
+
+        def start(requests):
+            # Runs with the loader's writes held off, so none falls between the copy and the swap
+            with self._lock:
+                if self._state is not None and self._pid == os.getpid():
+                    return None
+                self._state = dict(requests)
+                self._pid = os.getpid()
+                self._generation += 1
+                return self._generation
+
+        generation = self.loader.with_snapshot(start)
+        if generation is not None and hasattr(self.repo.ref(COLLECTION), 'stream'):
+            threading.Thread(target=self._run_upstream, args=(generation,),
+                             name='request-feed', daemon=True).start()
+
+    def _run_upstream(self, generation):
+        """Keep a database stream open until the feed is stopped or restarted."""
+        def handle(message):
+            if self._generation != generation:
+                raise _StreamClosed()
+            self._on_stream_event(message)
+
+        while self._generation == generation:
+            try:
+                self.repo.ref(COLLECTION).stream(handle, is_async=False)
+            except _StreamClosed:
+                return
+            except Exception as e:
+                logger.warning(f"help_requests stream interrupted: {str(e)}")
+            time.sleep(self.reconnect_delay)
+
+    def _on_stream_event(self, message):
+        if not isinstance(message, dict) or message.get('event') not in ('put', 'patch'):
+            return
+        segments = split_path(message.get('path') or '/')
+        data = message.get('data')
+        if message['event'] == 'put':
+            self._apply(segments, data)
+        else:
+            for key, value in (data or {}).items():
+                self._apply(segments + split_path(key), value)
+
+    # SnapshotLoader consumer interface
+    def load(self, requests):
+        self._apply([], requests)
+
+    def put(self, request_id, record):
+        self._apply([request_id], record)
+
+    def _apply(self, segments, value):
+        """Apply a write at ``help_requests/<segments>`` and notify subscribers."""
+        changes = []
+        with self._lock:
+            if self._state is None:
+                return
+            if not segments:
+                value = value or {}
+                for request_id in set(self._state) | set(value):
+                    self._replace(request_id, value.get(request_id), changes)
+            elif len(segments) == 1:
+                self._replace(segments[0], value, changes)
+            else:
+                record = copy.deepcopy(self._state.get(segments[0])) or {}
+                node = record
+                for key in segments[1:-1]:
+                    if not isinstance(node.get(key), dict):
+                        node[key] = {}
+                    node = node[key]
+                if value is None:
+                    node.pop(segments[-1], None)
+                else:
+                    node[segments[-1]] = value
+                self._replace(segments[0], record or None, changes)
+            subscribers = list(self._subscribers)
+
+        for event_id, request_id, before, after in changes:
+            for subscription in subscribers:
+                subscription.offer(event_id, request_id, before, after)
+
+    def _replace(self, request_id, record, changes):
+        before = self._state.get(request_id)
+        if not isinstance(record, dict):
+            record = None
+        if record == before:
+            return
+        if record is None:
+            self._state.pop(request_id, None)
+        else:
+            self._state[request_id] = record
+        changes.append((next(self._ids), request_id, before, record))
@@ -0,0 +1,242 @@
+"""Geocoding and nearest-request lookups for help requests."""
+import heapq
+import json
+import math
+import re
+
+from indexes import LiveRequestIndex
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Offline gazetteer of the cities our requests come from: name -> (lat, lng)
+GAZETTEER = {
+    'agra': (27.1767, 78.0081),
+    'ahmedabad': (23.0225, 72.5714),
+    'amritsar': (31.6340, 74.8723),
+    'bangalore': (12.9716, 77.5946),
+    'bengaluru': (12.9716, 77.5946),
+    'bhopal': (23.2599, 77.4126),
+    'bhubaneswar': (20.2961, 85.8245),
+    'chandigarh': (30.7333, 76.7794),
+    'chennai': (13.0827, 80.2707),
+    'coimbatore': (11.0168, 76.9558),
+    'dehradun': (30.3165, 78.0322),
+    'delhi': (28.6139, 77.2090),
+    'new delhi': (28.6139, 77.2090),
+    'goa': (15.2993, 74.1240),
+    'gurgaon': (28.4595, 77.0266),
+    'gurugram': (28.4595, 77.0266),
+    'guwahati': (26.1445, 91.7362),
+    'hyderabad': (17.3850, 78.4867),
+    'indore': (22.7196, 75.8577),
+    'jaipur': (26.9124, 75.7873),
+    'kanpur': (26.4499, 80.3319),
+    'kochi': (9.9312, 76.2673),
+    'kolkata': (22.5726, 88.3639),
+    'lucknow': (26.8467, 80.9462),
+    'ludhiana': (30.9010, 75.8573),
+    'madurai': (9.9252, 78.1198),
+    'mangalore': (12.9141, 74.8560),
+    'mumbai': (19.0760, 72.8777),
+    'mysore': (12.2958, 76.6394),
+    'nagpur': (21.1458, 79.0882),
+    'nashik': (19.9975, 73.7898),
+    'navi mumbai': (19.0330, 73.0297),
+    'noida': (28.5355, 77.3910),
+    'patna': (25.5941, 85.1376),
+    'pune': (18.5204, 73.8567),
+    'raipur': (21.2514, 81.6296),
+    'ranchi': (23.3441, 85.3096),
+    'surat': (21.1702, 72.8311),
+    'thane': (19.2183, 72.9781),
+    'thiruvananthapuram': (8.5241, 76.9366),
+    'vadodara': (22.3072, 73.1812),
+    'varanasi': (25.3176, 82.9739),
+    'vijayawada': (16.5062, 80.6480),
+    'visakhapatnam': (17.6868, 83.2185),
+}
+
+_LAT_LNG = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$')
+
+
+def load_gazetteer(path):
+    """Merge extra ``{"place": [lat, lng]}`` entries from a JSON file."""
+    with open(path, 'r', encoding='utf-8') as fh:
+        for name, (lat, lng) in json.load(fh).items():
+            GAZETTEER[name.strip().lower()] = (float(lat), float(lng))
+
+
+def valid_coordinates(lat, lng):
+    """Return ``(lat, lng)`` as floats, or None if they are not a valid position."""
+    try:
+        lat, lng = float(lat), float(lng)
+    except (TypeError, ValueError):
+        return None
+    if -90 <= lat <= 90 and -180 <= lng <= 180:
+        return lat, lng
+    return None
+
+
+def geocode(location):
+    """Resolve a free-text location ("Kalina Campus, Mumbai" or "19.07,72.87")."""
+    if not isinstance(location, str) or not location.strip():
+        return None
+    match = _LAT_LNG.match(location)
+    if match:
+        return valid_coordinates(match.group(1), match.group(2))
+
+    # Prefer the most specific part: later comma separated parts are usually
+    # the city/state, so check each part and then each word run within it
+    parts = [part.strip().lower() for part in location.split(',') if part.strip()]
+    for part in parts:
+        if part in GAZETTEER:
+            return GAZETTEER[part]
+    for part in parts:
+        words = re.findall(r'[a-z]+', part)
+        for size in (2, 1):
+            for i in range(len(words) - size + 1):
+                name = ' '.join(words[i:i + size])
+                if name in GAZETTEER:
+                    return GAZETTEER[name]
+    return None
+
+
+def record_coordinates(record):
+    """Coordinates stored on a request/user record, falling back to its location text."""
+    if not isinstance(record, dict):
+        return None
+    coordinates = record.get('coordinates')
+    if isinstance(coordinates, dict):
+        point = valid_coordinates(coordinates.get('lat'), coordinates.get('lng'))
+        if point:
+            return point
+    return geocode(record.get('location'))
+
+
+def haversine_km(a, b):
+    lat1, lng1 = map(math.radians, a)
+    lat2, lng2 = map(math.radians, b)
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(h)))
+
+
+class GeoIndex(LiveRequestIndex):
+    """Uniform lat/lng grid over open help requests.
+
+    Radius queries only visit the cells overlapping the search box, and
+    nearest-K queries expand ring by ring from the origin cell, stopping once
+    no unvisited cell can hold anything closer than the K-th hit.
+    """
+
+    def __init__(self, loader, cell_degrees=0.05):
+        super().__init__(loader)
+        self.cell_degrees = cell_degrees
+        # Smallest north-south extent of a cell in km, used as ring distance bound
+        self._cell_km = math.radians(cell_degrees) * EARTH_RADIUS_KM
+        self._clear()
+
+    def _clear(self):
+        self._cells = {}
+        self._points = {}
+        self._records = {}
+
+    def _cell(self, point):
+        return (math.floor(point[0] / self.cell_degrees), math.floor(point[1] / self.cell_degrees))
+
+    def _add(self, request_id, request_data):
+        point = record_coordinates(request_data)
+        if point is None:
+            return
+        self._points[request_id] = point
+        self._records[request_id] = request_data
+        self._cells.setdefault(self._cell(point), set()).add(request_id)
+
+    def _discard(self, request_id):
+        point = self._points.pop(request_id, None)
+        self._records.pop(request_id, None)
+        if point is None:
+            return
+        cell = self._cell(point)
+        members = self._cells.get(cell)
+        if members is not None:
+            members.discard(request_id)
+            if not members:
+                del self._cells[cell]
+
+    @staticmethod
+    def _ring_cells(row, col, ring):
+        """Cells at Chebyshev distance exactly ``ring`` from ``(row, col)``."""
+        if ring == 0:
+            return [(row, col)]
+        cells = [(row - ring, c) for c in range(col - ring, col + ring + 1)]
+        cells += [(row + ring, c) for c in range(col - ring, col + ring + 1)]
+        cells += [(r, col - ring) for r in range(row - ring + 1, row + ring)]
+        cells += [(r, col + ring) for r in range(row - ring + 1, row + ring)]
+        return cells
+
+    def within(self, origin, radius_km):
+        """``(request_id, distance_km)`` pairs within ``radius_km``, nearest first."""
+        self.ensure_fresh()
+        lat_span = radius_km / self._cell_km
+        lng_span = lat_span / max(math.cos(math.radians(origin[0])), 0.01)
+        row, col = self._cell(origin)
+        rows = range(row - math.ceil(lat_span), row + math.ceil(lat_span) + 1)
+        cols = range(col - math.ceil(lng_span), col + math.ceil(lng_span) + 1)
+
+        hits = []
+        with self._lock:
+            if len(rows) * len(cols) > len(self._cells):
+                # Search box is larger than the populated grid; scan the cells we have
+                cells = [members for (r, c), members in self._cells.items() if r in rows and c in cols]
+            else:
+                cells = [self._cells[(r, c)] for r in rows for c in cols if (r, c) in self._cells]
+            for members in cells:
+                for request_id in members:
+                    distance = haversine_km(origin, self._points[request_id])
+                    if distance <= radius_km:
+                        hits.append((request_id, distance))
+        hits.sort(key=lambda hit: hit[1])
+        return hits
+
+    def nearest(self, origin, k=10, max_km=None):
+        """Up to ``k`` ``(request_id, distance_km)`` pairs closest to ``origin``."""
+        self.ensure_fresh()
+        if k <= 0:
+            return []
+        row, col = self._cell(origin)
+        lng_scale = max(math.cos(math.radians(origin[0])), 0.01)
+
+        hits = []
+        with self._lock:
+            ring = 0
+            while self._cells:
+                if 8 * ring > len(self._cells):
+                    # Sparse grid: a ring now has more cells than are populated,
+                    # so finish with the populated cells we have not visited yet
+                    for (r, c), members in self._cells.items():
+                        if max(abs(r - row), abs(c - col)) >= ring:
+                            hits.extend((request_id, haversine_km(origin, self._points[request_id]))
+                                        for request_id in members)
+                    break
+                for cell in self._ring_cells(row, col, ring):
+                    for request_id in self._cells.get(cell, ()):
+                        hits.append((request_id, haversine_km(origin, self._points[request_id])))
+                # Anything in later rings is at least ``ring`` cell widths away
+                bound = ring * self._cell_km * lng_scale
+                if max_km is not None and bound > max_km:
+                    break
+                if len(hits) >= k and heapq.nsmallest(k, (hit[1] for hit in hits))[-1] <= bound:
+                    break
+                ring += 1
+
+        if max_km is not None:
+            hits = [hit for hit in hits if hit[1] <= max_km]
+        hits.sort(key=lambda hit: hit[1])
+        return hits[:k]
+
+    def nearby_requests(self, origin, k=10, max_km=None):
+        """Ordered ``{request_id: request_data}`` of the nearest requests, with ``distance``."""
+        hits = self.nearest(origin, k, max_km)
+        with self._lock:
+            return {request_id: dict(self._records[request_id], distance=round(distance, 1))
+                    for request_id, distance in hits if request_id in self._records}
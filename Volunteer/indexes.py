@@ -0,0 +1,316 @@
+"""Secondary indexes for help requests.
+
+Index entries live under ``help_request_index/<field>/<value>/<request_id>``
+and are written in the same multi-path update as the request itself, so they
+never drift from the data. ``status`` follows a request through its whole
+lifecycle (active, assigned, completed); ``priority``, ``org_id`` and
+``request_type`` only index the open queue in ``help_requests``.
+
+``LiveRequestIndex`` is the base for in-process structures over the open
+queue (skill matching, location, urgency) that need answers faster than a
+database round trip. They share one ``SnapshotLoader``, so the queue is
+downloaded once per refresh however many of them there are.
+"""
+import copy
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+INDEX_ROOT = 'help_request_index'
+
+OPEN_STATUSES = ('active', 'pending')
+
+# Fields indexed for every request, and fields indexed only while it is open
+LIFECYCLE_FIELDS = ('status',)
+OPEN_FIELDS = ('priority', 'org_id', 'request_type')
+
+INDEXED_FIELDS = LIFECYCLE_FIELDS + OPEN_FIELDS
+
+_INVALID_KEY_CHARS = re.compile(r'[.#$\[\]/]')
+
+
+def index_key(value):
+    """Turn a field value into a legal RTDB key."""
+    return _INVALID_KEY_CHARS.sub('_', str(value)) or '_'
+
+
+def index_path(field, value, request_id=None):
+    path = f"{INDEX_ROOT}/{field}/{index_key(value)}"
+    return f"{path}/{request_id}" if request_id else path
+
+
+def index_entries(request_id, request_data):
+    """Return the set of index paths a request record should occupy."""
+    if not request_data:
+        return set()
+
+    fields = LIFECYCLE_FIELDS
+    if request_data.get('status') in OPEN_STATUSES:
+        fields = INDEXED_FIELDS
+
+    paths = set()
+    for field in fields:
+        value = request_data.get(field)
+        if value not in (None, ''):
+            paths.add(index_path(field, value, request_id))
+    return paths
+
+
+def index_updates(request_id, before, after):
+    """Multi-path update entries that move a request from ``before`` to ``after``.
+
+    Pass ``before=None`` for a new request and ``after=None`` for a deleted one.
+    """
+    old_paths = index_entries(request_id, before)
+    new_paths = index_entries(request_id, after)
+    updates = {path: None for path in old_paths - new_paths}
+    updates.update({path: True for path in new_paths - old_paths})
+    return updates
+
+
+def build_index(records):
+    """Build the full index tree from ``(request_id, request_data)`` pairs."""
+    tree = {}
+    for request_id, request_data in records:
+        for path in index_entries(request_id, request_data):
+            _, field, value, _ = path.split('/')
+            tree.setdefault(field, {}).setdefault(value, {})[request_id] = True
+    return tree
+
+
+class SnapshotLoader:
+    """The open ``help_requests`` queue, downloaded once for every in-process consumer.
+
+    Indexes (and the live feed) ``register`` with the loader and receive
+    ``load(requests)`` with the whole queue and ``put(request_id, record)``
+    for each changed request. The loader subscribes to the repository's
+    writes, so this process's own writes reach every consumer at once;
+    writes by other workers arrive with the next refresh, every
+    ``refresh_interval`` seconds.
+
+    Only the first use downloads inline. Later refreshes run on a background
+    thread while consumers keep serving what they have, and at most one
+    download is in flight. Writes applied while it is in flight are replayed
+    over the downloaded queue, so a refresh never brings back a request this
+    process has just taken off the queue.
+    """
+
+    def __init__(self, repo, refresh_interval=300, retry_delay=10, clock=time.monotonic):
+        self.repo = repo
+        self.refresh_interval = refresh_interval
+        self.retry_delay = retry_delay
+        self._clock = clock
+        self._consumers = []
+        # Held while the queue changes and consumers are updated
+        self._lock = threading.RLock()
+        self._requests = None
+        self._due_at = None
+        self._refreshing = None
+        self._journal = None
+        self._superseded = False
+        self._stale = False
+        repo.subscribe(self._on_write)
+
+    def register(self, consumer):
+        with self._lock:
+            self._consumers.append(consumer)
+
+    def ensure_fresh(self):
+        """Load the queue on first use, and refresh it in the background once it is due."""
+        if self._requests is None:
+            self.refresh()
+        elif self._clock() >= self._due_at:
+            self._refresh_in_background()
+
+    def with_snapshot(self, callback):
+        """Call ``callback(requests)`` with the current queue, holding off writes until it returns."""
+        self.ensure_fresh()
+        with self._lock:
+            return callback(self._requests or {})
+
+    def invalidate(self):
+        """Refresh on next use."""
+        with self._lock:
+            if self._due_at is not None:
+                self._due_at = self._clock()
+
+    def stats(self):
+        with self._lock:
+            return {'requests': len(self._requests or {}), 'consumers': len(self._consumers),
+                    'refreshing': self._refreshing is not None}
+
+    def refresh(self):
+        """Download the queue and load it into every consumer, or wait for the download in flight."""
+        done, leading = self._begin_refresh()
+        if leading:
+            self._download(done)
+        else:
+            done.wait()
+
+    def _refresh_in_background(self):
+        done, leading = self._begin_refresh()
+        if leading:
+            threading.Thread(target=self._background_refresh, args=(done,),
+                             name='request-snapshot', daemon=True).start()
+
+    def _background_refresh(self, done):
+        try:
+            self._download(done)
+        except Exception as e:
+            logger.error(f"help_requests refresh failed: {str(e)}")
+
+    def _begin_refresh(self):
+        with self._lock:
+            if self._refreshing is not None:
+                return self._refreshing, False
+            self._refreshing = threading.Event()
+            self._journal = {}
+            self._superseded = False
+            self._stale = False
+            return self._refreshing, True
+
+    def _download(self, done):
+        requests = None
+        try:
+            requests = self.repo.get_help_requests()
+        finally:
+            with self._lock:
+                journal, self._journal, self._refreshing = self._journal, None, None
+                if requests is None:
+                    if self._due_at is not None:
+                        self._due_at = self._clock() + self.retry_delay
+                elif self._superseded:
+                    # The whole collection was written during the download
+                    self._due_at = self._clock() + self.refresh_interval
+                else:
+                    for request_id, record in journal.items():
+                        if record is None:
+                            requests.pop(request_id, None)
+                        else:
+                            requests[request_id] = record
+                    self._load(requests)
+                    if self._stale:
+                        self._due_at = self._clock()
+            done.set()
+
+    def _load(self, requests):
+        self._requests = requests
+        self._due_at = self._clock() + self.refresh_interval
+        for consumer in self._consumers:
+            consumer.load(requests)
+
+    def _on_write(self, path, value):
+        segments = [segment for segment in path.split('/') if segment]
+        if not segments:
+            value = value.get('help_requests') if isinstance(value, dict) else None
+        elif segments[0] != 'help_requests':
+            return
+        if len(segments) <= 1:
+            self._replace(value)
+        elif len(segments) == 2:
+            self._put(segments[1], value)
+        else:
+            self._patch(segments[1], segments[2:], value)
+
+    def _replace(self, requests):
+        with self._lock:
+            if self._refreshing is not None:
+                self._superseded = True
+            elif self._requests is None:
+                return
+            self._load(dict(requests) if isinstance(requests, dict) else {})
+
+    def _put(self, request_id, record):
+        if not isinstance(record, dict):
+            record = None
+        with self._lock:
+            if self._journal is not None:
+                self._journal[request_id] = record
+            if self._requests is None:
+                return
+            if record is None:
+                self._requests.pop(request_id, None)
+            else:
+                self._requests[request_id] = record
+            for consumer in self._consumers:
+                consumer.put(request_id, record)
+
+    def _patch(self, request_id, keys, value):
+        with self._lock:
+            if self._requests is None:
+                # A download in flight may or may not include this write
+                self._stale = self._refreshing is not None
+                return
+            record = copy.deepcopy(self._requests.get(request_id)) or {}
+            node = record
+            for key in keys[:-1]:
+                if not isinstance(node.get(key), dict):
+                    node[key] = {}
+                node = node[key]
+            if value is None:
+                node.pop(keys[-1], None)
+            else:
+                node[keys[-1]] = value
+            self._put(request_id, record or None)
+
+
+class LiveRequestIndex:
+    """Base class for in-process indexes over the open ``help_requests`` queue.
+
+    The queue and its changes come from a shared ``SnapshotLoader``.
+    Subclasses implement ``_clear``, ``_add`` and ``_discard``; all three are
+    called with ``self._lock`` held.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self._lock = threading.RLock()
+        self._loaded = False
+        # Bumped on every change, so callers can memoize query results
+        self.version = 0
+        loader.register(self)
+
+    def load(self, requests):
+        """Replace the index contents with ``requests`` (id -> record)."""
+        with self._lock:
+            self._clear()
+            for request_id, request_data in (requests or {}).items():
+                if self._is_open(request_data):
+                    self._add(request_id, request_data)
+            self._loaded = True
+            self.version += 1
+
+    def ensure_fresh(self):
+        self.loader.ensure_fresh()
+        if not self._loaded:
+            self.loader.with_snapshot(self.load)
+
+    def invalidate(self):
+        """Refresh the shared queue on next use."""
+        self.loader.invalidate()
+
+    def put(self, request_id, request_data):
+        """Add, replace or (for closed/None records) remove one request."""
+        with self._lock:
+            if not self._loaded:
+                return
+            self._discard(request_id)
+            if self._is_open(request_data):
+                self._add(request_id, request_data)
+            self.version += 1
+
+    @staticmethod
+    def _is_open(request_data):
+        return isinstance(request_data, dict) and request_data.get('status', 'active') in OPEN_STATUSES
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _add(self, request_id, request_data):
+        raise NotImplementedError
+
+    def _discard(self, request_id):
+        raise NotImplementedError
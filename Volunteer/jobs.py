@@ -0,0 +1,208 @@
+"""In-process background job queue for side effects that can run after the response."""
+import heapq
+import itertools
+import logging
+import os
+import random
+import threading
+import time
+import traceback
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    __slots__ = ('id', 'name', 'args', 'kwargs', 'attempts', 'last_error', 'enqueued_at')
+
+    def __init__(self, job_id, name, args, kwargs):
+        self.id = job_id
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+        self.attempts = 0
+        self.last_error = None
+        self.enqueued_at = time.time()
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'enqueued_at': self.enqueued_at,
+        }
+
+
+class JobQueue:
+    """Named jobs run by a small pool of worker threads.
+
+    Handlers are registered by name with ``@queue.handler('name')`` and jobs
+    are queued with ``queue.enqueue('name', *args)``. A failing job is retried
+    with exponential backoff and jitter, up to ``max_attempts``; after that it
+    goes to a bounded dead-letter list, where it can be inspected and
+    re-queued with ``retry_dead``. Worker threads start on first use and
+    again after a fork, like ``CounterBatcher``'s flusher.
+    """
+
+    def __init__(self, workers=2, max_attempts=5, base_delay=1.0, max_delay=300.0,
+                 dead_letter_size=1000, clock=time.monotonic):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._clock = clock
+        self._handlers = {}
+        self._heap = []
+        self._sequence = itertools.count()
+        self._ids = itertools.count(1)
+        self._dead = deque(maxlen=dead_letter_size)
+        self._running = 0
+        self._cond = threading.Condition()
+        self._threads = []
+        self._pid = None
+        self._stopping = False
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+
+    def handler(self, name):
+        def register(func):
+            self._handlers[name] = func
+            return func
+        return register
+
+    def enqueue(self, name, *args, delay=0, **kwargs):
+        """Queue ``name(*args, **kwargs)`` to run after ``delay`` seconds; returns the job id."""
+        if name not in self._handlers:
+            raise KeyError(f"No handler registered for job '{name}'")
+        job = Job(next(self._ids), name, args, kwargs)
+        self._ensure_workers()
+        self._push(job, delay)
+        return job.id
+
+    def _push(self, job, delay):
+        with self._cond:
+            heapq.heappush(self._heap, (self._clock() + delay, next(self._sequence), job))
+            self._cond.notify()
+
+    def _ensure_workers(self):
+        if self._pid is not None and self._pid != os.getpid():
+            # Forked: the parent's threads are gone (but still registered as
+            # waiters on the inherited condition) and its jobs are its own to run
+            self._cond = threading.Condition()
+            self._heap = []
+            self._running = 0
+            self._pid = None
+        with self._cond:
+            if self._pid == os.getpid() and not self._stopping:
+                return
+            self._pid = os.getpid()
+            self._stopping = False
+            self._threads = [threading.Thread(target=self._work, name=f'jobs-{i}', daemon=True)
+                             for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def _next_job(self):
+        with self._cond:
+            while True:
+                if self._stopping and not self._heap:
+                    return None
+                if self._heap:
+                    run_at = self._heap[0][0]
+                    wait = run_at - self._clock()
+                    if wait <= 0:
+                        self._running += 1
+                        return heapq.heappop(self._heap)[2]
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                self._run(job)
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    self._cond.notify_all()
+
+    def _run(self, job):
+        job.attempts += 1
+        try:
+            self._handlers[job.name](*job.args, **job.kwargs)
+        except Exception as e:
+            job.last_error = f"{type(e).__name__}: {str(e)}"
+            if job.attempts >= self.max_attempts:
+                logger.error(f"Job {job.name}#{job.id} failed after {job.attempts} attempts: {job.last_error}")
+                logger.debug(traceback.format_exc())
+                with self._cond:
+                    self.failed += 1
+                    self._dead.append(job)
+                return
+            delay = min(self.max_delay, self.base_delay * 2 ** (job.attempts - 1))
+            delay *= random.uniform(0.5, 1.0)
+            logger.warning(f"Job {job.name}#{job.id} failed (attempt {job.attempts}), retrying in {delay:.1f}s: {job.last_error}")
+            with self._cond:
+                self.retried += 1
+            self._push(job, delay)
+        else:
+            with self._cond:
+                self.completed += 1
+
+    def dead_letters(self):
+        with self._cond:
+            return [job.to_dict() for job in self._dead]
+
+    def retry_dead(self, job_id=None):
+        """Re-queue one dead job (or all of them) with a fresh attempt budget."""
+        self._ensure_workers()
+        with self._cond:
+            jobs = [job for job in self._dead if job_id is None or job.id == job_id]
+            for job in jobs:
+                self._dead.remove(job)
+                job.attempts = 0
+        for job in jobs:
+            self._push(job, 0)
+        return len(jobs)
+
+    def join(self, timeout=None):
+        """Wait until no job is queued or running; returns False on timeout."""
+        deadline = None if timeout is None else self._clock() + timeout
+        with self._cond:
+            while self._heap or self._running:
+                remaining = None if deadline is None else deadline - self._clock()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout=5):
+        """Let workers finish due jobs, then stop them (called at exit)."""
+        with self._cond:
+            if self._pid != os.getpid():
+                return
+            self._stopping = True
+            # Jobs scheduled for a later retry are not waited for
+            now = self._clock()
+            self._heap = [entry for entry in self._heap if entry[0] <= now]
+            heapq.heapify(self._heap)
+            self._cond.notify_all()
+            threads = list(self._threads)
+        for thread in threads:
+            thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'queued': len(self._heap),
+                'running': self._running,
+                'completed': self.completed,
+                'retried': self.retried,
+                'failed': self.failed,
+                'dead_letters': len(self._dead),
+            }
@@ -0,0 +1,123 @@
+"""Matching volunteers to open help requests."""
+import bisect
+import heapq
+from itertools import combinations
+
+from indexes import LiveRequestIndex
+from timestamps import record_epoch
+
+PRIORITY_RANK = {'low': 0, 'medium': 1, 'high': 2, 'urgent': 3}
+
+
+def normalize_skills(skills):
+    """Lower-cased, de-duplicated skills from a list, dict or comma separated string."""
+    if not skills:
+        return frozenset()
+    if isinstance(skills, str):
+        skills = skills.split(',')
+    elif isinstance(skills, dict):
+        skills = skills.values()
+    return frozenset(str(skill).strip().lower() for skill in skills if str(skill).strip())
+
+
+def created_timestamp(request_data):
+    """Creation time of a request as epoch seconds (0 when unknown)."""
+    return record_epoch(request_data, 'created_at') or 0.0
+
+
+class SkillMatcher(LiveRequestIndex):
+    """Inverted index from skill to open help requests, with ranked top-K matching.
+
+    Matches are ranked by skill overlap, then priority, then age (longest
+    waiting first). Each skill's posting list is kept sorted by that
+    priority/age order, so the long tail of single-skill matches is read with
+    a lazy merge instead of sorting every candidate. Results are memoized per
+    skill set until the index changes.
+    """
+
+    def __init__(self, loader, memo_size=1024):
+        super().__init__(loader)
+        self.memo_size = memo_size
+        self._clear()
+
+    def _clear(self):
+        self._postings = {}
+        self._sorted_postings = {}
+        self._requests = {}
+        self._memo = {}
+
+    def _add(self, request_id, request_data):
+        skills = normalize_skills(request_data.get('skills'))
+        # Ascending sort key: higher priority first, then oldest first
+        sort_key = (-PRIORITY_RANK.get(request_data.get('priority'), 0), created_timestamp(request_data), request_id)
+        self._requests[request_id] = (skills, sort_key, request_data)
+        for skill in skills:
+            self._postings.setdefault(skill, set()).add(request_id)
+            bisect.insort(self._sorted_postings.setdefault(skill, []), sort_key)
+        self._memo.clear()
+
+    def _discard(self, request_id):
+        entry = self._requests.pop(request_id, None)
+        if entry is None:
+            return
+        skills, sort_key, _ = entry
+        for skill in skills:
+            self._postings[skill].discard(request_id)
+            ordered = self._sorted_postings[skill]
+            position = bisect.bisect_left(ordered, sort_key)
+            if position < len(ordered) and ordered[position] == sort_key:
+                del ordered[position]
+            if not self._postings[skill]:
+                del self._postings[skill]
+                del self._sorted_postings[skill]
+        self._memo.clear()
+
+    def match(self, skills, k=10):
+        """Return up to ``k`` ``(request_id, overlap)`` pairs, best match first."""
+        self.ensure_fresh()
+        with self._lock:
+            skills = frozenset(normalize_skills(skills) & self._postings.keys())
+            if not skills or k <= 0:
+                return []
+
+            memo_key = (skills, k)
+            cached = self._memo.get(memo_key)
+            if cached is not None:
+                return cached
+
+            ranked = []
+            overlap = {}
+            if len(skills) > 1:
+                # Requests sharing several skills are rare: find them with set
+                # intersections and rank them explicitly
+                postings = [self._postings[skill] for skill in skills]
+                multi = set()
+                for first, second in combinations(postings, 2):
+                    multi |= first & second
+                requests = self._requests
+                overlap = {request_id: len(requests[request_id][0] & skills) for request_id in multi}
+                ordered = sorted(multi, key=lambda request_id: (-overlap[request_id], requests[request_id][1]))
+                ranked = [(request_id, overlap[request_id]) for request_id in ordered[:k]]
+
+            if len(ranked) < k:
+                # Fill up with single-skill matches straight from the sorted postings
+                merged = heapq.merge(*(self._sorted_postings[skill] for skill in skills))
+                for sort_key in merged:
+                    request_id = sort_key[-1]
+                    if request_id in overlap:
+                        continue
+                    ranked.append((request_id, 1))
+                    if len(ranked) == k:
+                        break
+
+            if len(self._memo) >= self.memo_size:
+                self._memo.clear()
+            self._memo[memo_key] = ranked
+            return ranked
+
+    def matching_requests(self, skills, k=10):
+        """Like ``match`` but returns an ordered ``{request_id: request_data}`` map."""
+        matches = self.match(skills, k)
+        with self._lock:
+            return {request_id: dict(self._requests[request_id][2], match_score=score)
+                    for request_id, score in matches if request_id in self._requests}
@@ -0,0 +1,214 @@
+"""Request, database and template instrumentation with a Prometheus text endpoint.
+
+``AppMetrics.init_app`` times every request (by route rule, method and
+status) and every template render. ``AppMetrics.call`` is the hook the
+repository wraps each database call in; it records call counts and latency
+by top-level path (``help_requests``, ``users``, ...) and the bytes the
+Firebase HTTP session reports for the call. ``render`` produces the
+Prometheus text format served at ``/metrics``.
+
+With profiling enabled, a request sent with an ``X-Profile`` header gets a
+``Server-Timing`` header and an ``X-Profile`` header listing its database
+calls.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request, template_rendered, before_render_template
+
+from datastore import split_path
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+INF_BUCKET = 'le="+Inf"'
+
+# Bytes transferred by the database call running in this context
+_current_call = contextvars.ContextVar('current_call', default=None)
+# Database calls of the request being profiled (shared with fan-out threads)
+_profile = contextvars.ContextVar('profile', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values=(), amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, label_values)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            if position < len(self.buckets):
+                series[0][position] += 1
+            series[1] += value
+            series[2] += 1
+
+    def collect(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = _labels(self.labels, label_values, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                lines.append(f"{self.name}_bucket{_labels(self.labels, label_values, INF_BUCKET)} {count}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {count}")
+        return lines
+
+
+class AppMetrics:
+    """The app's metrics: request latency, database calls, template renders and gauges."""
+
+    def __init__(self, profiling=False):
+        self.profiling = profiling
+        self.request_latency = Histogram('http_request_duration_seconds', 'Request latency by route.',
+                                         ('route', 'method', 'status'))
+        self.db_latency = Histogram('firebase_call_duration_seconds', 'Database call latency by path prefix.',
+                                    ('prefix', 'op'))
+        self.db_bytes = Counter('firebase_call_bytes_total', 'Bytes sent and received by database calls.',
+                                ('prefix', 'op'))
+        self.template_latency = Histogram('template_render_duration_seconds', 'Template render time.',
+                                          ('template',))
+        self._metrics = [self.request_latency, self.db_latency, self.db_bytes, self.template_latency]
+        self._gauges = []
+
+    def add_gauges(self, prefix, snapshot):
+        """Export the numeric values of ``snapshot()`` (a dict) as ``<prefix>_<key>`` gauges."""
+        self._gauges.append((prefix, snapshot))
+
+    # Database calls
+    @contextmanager
+    def call(self, op, path):
+        """Time one database call; used by ``Repository``."""
+        segments = split_path(path)
+        prefix = segments[0] if segments else 'root'
+        transferred = [0]
+        token = _current_call.set(transferred)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            _current_call.reset(token)
+            self.db_latency.observe((prefix, op), elapsed)
+            if transferred[0]:
+                self.db_bytes.inc((prefix, op), transferred[0])
+            profile = _profile.get()
+            if profile is not None:
+                profile.append((op, '/'.join(segments[:2]), elapsed, transferred[0]))
+
+    @staticmethod
+    def add_transfer(nbytes):
+        """Attribute ``nbytes`` of HTTP traffic to the database call in progress."""
+        transferred = _current_call.get()
+        if transferred is not None:
+            transferred[0] += nbytes
+
+    # Flask integration
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        before_render_template.connect(self._before_render, app, weak=False)
+        template_rendered.connect(self._after_render, app, weak=False)
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.template_time = 0.0
+        if self.profiling and request.headers.get('X-Profile'):
+            g.metrics_profile = []
+            g.metrics_profile_token = _profile.set(g.metrics_profile)
+
+    def _after_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule else '<unmatched>'
+        self.request_latency.observe((route, request.method, str(response.status_code)), elapsed)
+
+        calls = g.pop('metrics_profile', None)
+        if calls is not None:
+            _profile.reset(g.pop('metrics_profile_token'))
+            db_time = sum(call[2] for call in calls)
+            response.headers['Server-Timing'] = ', '.join([
+                f'db;dur={db_time * 1000:.1f};desc="{len(calls)} calls"',
+                f'tpl;dur={g.get("template_time", 0.0) * 1000:.1f}',
+                f'total;dur={elapsed * 1000:.1f}',
+            ])
+            # Slowest calls first, capped to keep the header small
+            slowest = sorted(calls, key=lambda call: call[2], reverse=True)[:20]
+            response.headers['X-Profile'] = '; '.join(
+                f"{op} {path} {seconds * 1000:.1f}ms {nbytes}B" for op, path, seconds, nbytes in slowest)
+        return response
+
+    def _before_render(self, sender, template, context, **extra):
+        g.setdefault('metrics_templates', []).append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        starts = g.get('metrics_templates')
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        self.template_latency.observe((template.name or '<string>',), elapsed)
+        if 'template_time' in g:
+            g.template_time += elapsed
+
+    # Exposition
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        for prefix, snapshot in self._gauges:
+            try:
+                values = snapshot()
+            except Exception:
+                continue
+            for key, value in sorted(values.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"# TYPE {prefix}_{key} gauge")
+                    lines.append(f"{prefix}_{key} {_number(value)}")
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,198 @@
+"""Server-side sessions.
+
+The session cookie carries only a random session ID; the session data itself
+lives in a ``MemorySessionStore`` (one process) or a ``FileSessionStore``
+(shared by all workers on a host). Cookie size and the per-request
+(de)serialization cost no longer depend on what is in the session, and data
+in it is never sent to the browser.
+"""
+import os
+import secrets
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask.sessions import SessionInterface, SessionMixin, session_json_serializer
+from werkzeug.datastructures import CallbackDict
+
+from cache import TTLCache
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.rotate = False
+
+    def regenerate(self):
+        """Move the data to a fresh session ID (call after login)."""
+        self.rotate = True
+        self.modified = True
+
+
+class MemorySessionStore:
+    """Sessions in this process's memory, LRU-evicted beyond ``max_sessions``."""
+
+    def __init__(self, ttl, max_sessions=10000):
+        self._cache = TTLCache(maxsize=max_sessions, ttl=ttl)
+
+    def load(self, sid):
+        return self._cache.get(sid)
+
+    def save(self, sid, data):
+        self._cache.set(sid, data)
+
+    def touch(self, sid):
+        data = self._cache.get(sid)
+        if data is not None:
+            self._cache.set(sid, data)
+
+    def delete(self, sid):
+        self._cache.invalidate(sid)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+class FileSessionStore:
+    """One file per session in ``directory``; expiry and eviction go by modification time.
+
+    Expired files are removed, and the oldest beyond ``max_sessions`` evicted,
+    every ``prune_every`` saves.
+    """
+
+    def __init__(self, directory, ttl, max_sessions=100000, prune_every=500, clock=time.time):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.prune_every = prune_every
+        self._clock = clock
+        self._saves = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, sid):
+        return os.path.join(self.directory, sid)
+
+    def load(self, sid):
+        path = self._path(sid)
+        try:
+            if os.path.getmtime(path) + self.ttl < self._clock():
+                self.delete(sid)
+                return None
+            with open(path, 'rb') as fh:
+                return fh.read()
+        except OSError:
+            return None
+
+    def save(self, sid, data):
+        path = self._path(sid)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._saves += 1
+            prune = self._saves % self.prune_every == 0
+        if prune:
+            self.prune()
+
+    def touch(self, sid):
+        try:
+            os.utime(self._path(sid))
+        except OSError:
+            pass
+
+    def delete(self, sid):
+        try:
+            os.remove(self._path(sid))
+        except OSError:
+            pass
+
+    def prune(self):
+        """Remove expired sessions, then the least recently used beyond ``max_sessions``."""
+        entries = []
+        cutoff = self._clock() - self.ttl
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                try:
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    continue
+                if mtime < cutoff:
+                    self.delete(entry.name)
+                elif not entry.name.endswith('.tmp'):
+                    entries.append((mtime, entry.name))
+        if len(entries) > self.max_sessions:
+            entries.sort()
+            for _, name in entries[:len(entries) - self.max_sessions]:
+                self.delete(name)
+
+    def stats(self):
+        return {'size': sum(1 for name in os.listdir(self.directory) if not name.endswith('.tmp')),
+                'maxsize': self.max_sessions, 'ttl': self.ttl}
+
+
+class ServerSessionInterface(SessionInterface):
+    """Flask session interface keeping session data in a session store.
+
+    With ``SESSION_PERMANENT`` set (or ``session.permanent``) the cookie
+    expires ``PERMANENT_SESSION_LIFETIME`` after the last request and is
+    re-issued on every response, like Flask's own sessions with
+    ``SESSION_REFRESH_EACH_REQUEST``; otherwise it is a browser-session
+    cookie set only when the session ID changes.
+    """
+
+    serializer = session_json_serializer
+
+    def __init__(self, store):
+        self.store = store
+
+    @staticmethod
+    def _valid_sid(sid):
+        # Session IDs are token_urlsafe(32); anything else is never looked up
+        return bool(sid) and len(sid) == 43 and all(char.isalnum() or char in '-_' for char in sid)
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if self._valid_sid(sid):
+            data = self.store.load(sid)
+            if data is not None:
+                try:
+                    return ServerSideSession(self.serializer.loads(data), sid=sid)
+                except ValueError:
+                    self.store.delete(sid)
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.rotate:
+            self.store.delete(session.sid)
+            session.sid = secrets.token_urlsafe(32)
+        if session.modified:
+            self.store.save(session.sid, self.serializer.dumps(dict(session)).encode('utf-8'))
+        elif not session.new:
+            self.store.touch(session.sid)
+
+        permanent = session.permanent or app.config.get('SESSION_PERMANENT', False)
+        refresh = permanent and app.config['SESSION_REFRESH_EACH_REQUEST']
+        if session.new or session.rotate or refresh:
+            expires = datetime.now(timezone.utc) + app.permanent_session_lifetime if permanent else None
+            response.set_cookie(name, session.sid, expires=expires,
+                                httponly=self.get_cookie_httponly(app), domain=domain, path=path,
+                                secure=self.get_cookie_secure(app), samesite=self.get_cookie_samesite(app))
+            response.vary.add('Cookie')
@@ -178,10 +178,36 @@ document.addEventListener('DOMContentLoaded', function() {
     initializeCharts();
     initializeAnimations();
 
-    // Add Firebase real-time listener for new requests
-    initializeFirebaseListeners();
+    // Live updates for the requests shown on this dashboard
+    initializeRequestFeed();
+
+    // "Nearest" searches around the browser's position when allowed
+    initializeNearbyLinks();
 });
 
+// Add the browser position to links marked data-geolocate. If the position
+// is refused or unavailable the plain link is followed, and the server falls
+// back to the volunteer's saved location
+function initializeNearbyLinks() {
+    document.querySelectorAll('a[data-geolocate]').forEach(link => {
+        link.addEventListener('click', (event) => {
+            if (!navigator.geolocation) return;
+            event.preventDefault();
+
+            const follow = (position) => {
+                const url = new URL(link.href, window.location.origin);
+                if (position) {
+                    url.searchParams.set('lat', position.coords.latitude.toFixed(5));
+                    url.searchParams.set('lng', position.coords.longitude.toFixed(5));
+                }
+                window.location.href = url.toString();
+            };
+            navigator.geolocation.getCurrentPosition(follow, () => follow(null),
+                { timeout: 5000, maximumAge: 600000 });
+        });
+    });
+}
+
 // Filter requests based on selected tab
 function filterRequests(filter) {
     const tabs = document.querySelectorAll('.filter-tab');
@@ -480,45 +506,55 @@ function addNewRequestCard(requestId, request) {
     });
 }
 
-// Update the Firebase listener initialization
-function initializeFirebaseListeners() {
-    const helpRequestsRef = firebase.database().ref('help_requests');
+// Subscribe to the server's live feed of help request changes. The server
+// only sends changes for requests this dashboard can see (own organization,
+// or what the current volunteer view shows: matching skills, most urgent,
+// within the nearby radius, or everything)
+function initializeRequestFeed() {
+    if (!window.EventSource || !document.querySelector('.requests-grid')) return;
     
-    // Clear existing listeners
-    helpRequestsRef.off();
-    
-    // Track processed requests
-    const processedRequests = new Set();
+    const page = new URLSearchParams(window.location.search);
+    const params = new URLSearchParams();
+    ['view', 'lat', 'lng', 'radius'].forEach(name => {
+        if (page.get(name)) params.set(name, page.get(name));
+    });
+    const query = params.toString();
+    const source = new EventSource('/stream/requests' + (query ? `?${query}` : ''));
     
-    // Listen for new requests
-    helpRequestsRef.on('child_added', (snapshot) => {
-        const request = snapshot.val();
-        const requestId = snapshot.key;
+    // New requests
+    source.addEventListener('add', (event) => {
+        const { id, request } = JSON.parse(event.data);
+        if (isRequestDuplicate(id)) return;
         
-        // Check if we've already processed this request
-        if (processedRequests.has(requestId) || isRequestDuplicate(requestId)) {
-            return;
-        }
-        
-        // Mark as processed
-        processedRequests.add(requestId);
-        
-        // Show notification and popup for new requests
         showNotification('info', 'New Request', 'A new help request has been posted!');
-        showNewRequestPopup(request, requestId);
-        addNewRequestCard(requestId, request);
+        showNewRequestPopup(request, id);
+        addNewRequestCard(id, request);
     });
     
-    // Listen for removed requests
-    helpRequestsRef.on('child_removed', (snapshot) => {
-        const requestId = snapshot.key;
-        const cards = document.querySelectorAll(`.request-card[data-request-id="${requestId}"]`);
+    // Edited requests
+    source.addEventListener('change', (event) => {
+        const { id, request } = JSON.parse(event.data);
+        document.querySelectorAll(`.request-card[data-request-id="${id}"]`).forEach(card => {
+            card.dataset.priority = request.priority;
+            const title = card.querySelector('.request-title');
+            if (title) title.textContent = request.title;
+        });
+    });
+    
+    // Accepted, assigned or deleted requests
+    source.addEventListener('remove', (event) => {
+        const { id } = JSON.parse(event.data);
+        const cards = document.querySelectorAll(`.request-card[data-request-id="${id}"]`);
         cards.forEach(card => {
             card.classList.add('request-accepted');
             setTimeout(() => card.remove(), 500);
         });
-        // Remove from processed set
-        processedRequests.delete(requestId);
+    });
+    
+    // The server dropped events for this page; start again from a fresh render
+    source.addEventListener('reset', () => {
+        source.close();
+        window.location.reload();
     });
 }
 
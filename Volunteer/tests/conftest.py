@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def portal():
+    """The app module on an empty local database with in-memory sessions."""
+    os.environ.update(DATA_BACKEND='local', LOCAL_DB_SEED='', LOCAL_DB_PATH='',
+                      SESSION_BACKEND='memory', DOCUMENT_STORE='local')
+    import app as portal
+    portal.repo.set('', {})
+    return portal
+
+
+def seed(portal, tree):
+    """Replace the database with ``tree`` and rebuild the request indexes."""
+    portal.repo.set('', tree)
+    portal.repo.rebuild_help_request_index()
+
+
+def login(client, user_id, user_type='individual'):
+    with client.session_transaction() as session:
+        session['user'] = {'localId': user_id, 'type': user_type}
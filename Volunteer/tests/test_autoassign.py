@@ -0,0 +1,72 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from autoassign import current_slot, local_time
+from conftest import login, seed
+
+
+def utc(hour, minute):
+    # 2024-01-01 is a Monday
+    return datetime(2024, 1, 1, hour, minute, tzinfo=timezone.utc)
+
+
+def test_slot_boundary_is_taken_in_local_time():
+    # Noon in India is 06:30 UTC
+    assert current_slot(local_time(utc(6, 29), None, 'Asia/Kolkata')) == ('monday', 'morning')
+    assert current_slot(local_time(utc(6, 30), None, 'Asia/Kolkata')) == ('monday', 'afternoon')
+    # 20:00 UTC on Monday is already Tuesday morning in India
+    assert current_slot(local_time(utc(20, 0), None, 'Asia/Kolkata')) == ('tuesday', 'morning')
+
+
+def test_organization_time_zone_wins_and_unknown_names_fall_back():
+    assert current_slot(local_time(utc(6, 30), 'UTC', 'Asia/Kolkata')) == ('monday', 'morning')
+    assert current_slot(local_time(utc(6, 30), 'Not/AZone', 'Asia/Kolkata')) == ('monday', 'afternoon')
+
+
+@pytest.fixture
+def org_client(portal):
+    volunteer = {'type': 'individual', 'skills': ['cooking']}
+    seed(portal, {
+        'users': {
+            'morning': dict(volunteer, availability={'monday': ['morning']}),
+            'afternoon': dict(volunteer, availability={'monday': ['afternoon']}),
+        },
+        'organizations': {'o1': {'type': 'organization', 'org_name': 'Org',
+                                 'volunteers': {'morning': {'status': 'active'}, 'afternoon': {'status': 'active'}}}},
+        'help_requests': {'r1': {'status': 'active', 'priority': 'low', 'skills': ['cooking'], 'org_id': 'o1',
+                                 'created_at': '2024-01-01T00:00:00+00:00'}},
+    })
+    client = portal.app.test_client()
+    login(client, 'o1', 'organization')
+    return client
+
+
+def fix_now(monkeypatch, portal, moment):
+    class FixedDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return moment.astimezone(tz) if tz else moment.replace(tzinfo=None)
+    monkeypatch.setattr(portal, 'datetime', FixedDatetime)
+
+
+def test_auto_assign_matches_availability_in_local_time(portal, org_client, monkeypatch):
+    monkeypatch.setattr(portal, 'APP_TIMEZONE', 'Asia/Kolkata')
+    # 12:15 in India: only the afternoon volunteer is available
+    fix_now(monkeypatch, portal, utc(6, 45))
+
+    response = org_client.post('/auto-assign', json={'dry_run': True})
+
+    assert [item['volunteer_id'] for item in response.get_json()['assignments']] == ['afternoon']
+
+
+@pytest.mark.parametrize('limit', ['ten', -1, [5], {'n': 1}])
+def test_auto_assign_rejects_invalid_limit(org_client, limit):
+    response = org_client.post('/auto-assign', json={'dry_run': True, 'limit': limit})
+
+    assert response.status_code == 400
+    assert not response.get_json()['success']
+
+
+def test_auto_assign_rejects_non_object_body(org_client):
+    assert org_client.post('/auto-assign', json=[1, 2]).status_code == 400
@@ -0,0 +1,99 @@
+import io
+import json
+
+import pytest
+
+from bulk import iter_nodes
+
+DOCUMENT = {
+    'help_requests': {
+        '-Nabc': {'title': 'Caf\u00e9 \u6f22\u5b57 \U0001F600', 'quote': 'say "hi"\\now\n\ttab\u2028',
+                  'priority': 'urgent', 'count': -12.5e3, 'zero': 0, 'big': 12345678901234567890,
+                  'skills': ['first aid', 'sign language'], 'done': False, 'extra': None},
+        '-Nabd': {'nested': {'a': {'b': [1, 2.25, {'c': 'd'}]}}, 'empty': {}, 'list': []},
+    },
+    'users': {'u1': {'fullName': '\u00c9lodie \u00d8rsted'}, 'u2': 7},
+    'version': 3,
+    'flags': True,
+}
+
+
+def text_stream(document, ensure_ascii, indent=None):
+    raw = json.dumps(document, ensure_ascii=ensure_ascii, indent=indent).encode('utf-8')
+    return raw, io.TextIOWrapper(io.BytesIO(raw), encoding='utf-8')
+
+
+class TrickleBytes(io.RawIOBase):
+    """A byte stream that hands out one byte per read, splitting every multi-byte character."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.pos = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.pos >= len(self.raw) or not len(buffer):
+            return 0
+        buffer[0] = self.raw[self.pos]
+        self.pos += 1
+        return 1
+
+
+def rebuild(nodes):
+    tree = {}
+    for path, value in nodes:
+        *parents, leaf = path.split('/')
+        node = tree
+        for key in parents:
+            node = node.setdefault(key, {})
+        node[leaf] = value
+    return tree
+
+
+def expected_at_depth(document, depth):
+    """``document`` without the empty objects ``iter_nodes`` has no node for."""
+    if depth == 0 or not isinstance(document, dict):
+        return document
+    return {key: expected_at_depth(value, depth - 1) for key, value in document.items()
+            if not (depth > 1 and value == {})}
+
+
+@pytest.mark.parametrize('ensure_ascii', [True, False])
+@pytest.mark.parametrize('indent', [None, 2])
+def test_matches_json_load_at_every_chunk_size(ensure_ascii, indent):
+    raw, _ = text_stream(DOCUMENT, ensure_ascii, indent)
+    text = raw.decode('utf-8')
+    assert json.loads(text) == DOCUMENT
+    for chunk_size in range(1, len(text) + 1):
+        nodes = iter_nodes(io.StringIO(text), depth=2, chunk_size=chunk_size)
+        assert rebuild(nodes) == expected_at_depth(DOCUMENT, 2), chunk_size
+
+
+@pytest.mark.parametrize('depth', [1, 2, 3, 4])
+def test_depth_selects_the_yielded_nodes(depth):
+    _, stream = text_stream(DOCUMENT, ensure_ascii=False)
+    nodes = list(iter_nodes(stream, depth=depth, chunk_size=7))
+    assert rebuild(nodes) == expected_at_depth(DOCUMENT, depth)
+    if depth == 1:
+        assert [path for path, _ in nodes] == ['help_requests', 'users', 'version', 'flags']
+
+
+def test_multi_byte_characters_split_across_byte_reads():
+    raw, _ = text_stream(DOCUMENT, ensure_ascii=False)
+    stream = io.TextIOWrapper(io.BufferedReader(TrickleBytes(raw), buffer_size=1), encoding='utf-8')
+    assert rebuild(iter_nodes(stream, depth=2, chunk_size=3)) == expected_at_depth(DOCUMENT, 2)
+
+
+def test_numbers_cut_at_the_chunk_edge_are_read_whole():
+    text = '{"a": {"x": 12345.678e-2, "y": -9876543210}}'
+    for chunk_size in range(1, len(text) + 1):
+        assert dict(iter_nodes(io.StringIO(text), depth=2, chunk_size=chunk_size)) == {
+            'a/x': 123.45678, 'a/y': -9876543210}
+
+
+@pytest.mark.parametrize('text', ['[1, 2]', '{"a": 1 "b": 2}', '{"a": {"b": 1}', '{1: 2}'])
+def test_malformed_documents_raise(text):
+    with pytest.raises(ValueError):
+        list(iter_nodes(io.StringIO(text), depth=2, chunk_size=4))
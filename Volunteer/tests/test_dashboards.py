@@ -0,0 +1,36 @@
+import html
+import re
+
+from conftest import login, seed
+
+
+def card_ids(page):
+    return re.findall(r'class="request-card" data-request-id="([^"]+)"', page)
+
+
+def older_link(page):
+    match = re.search(r'<a href="([^"]+)" class="btn btn-outline-primary">\s*<i class="fas fa-chevron-down">', page)
+    return html.unescape(match.group(1)) if match else None
+
+
+def test_older_requests_link_keeps_paging_for_volunteer_with_skills(portal):
+    requests = {
+        f"req{i:02d}": {'title': f"Request {i}", 'description': 'd', 'location': 'Pune', 'status': 'active',
+                        'priority': 'low', 'skills': ['cooking'], 'org_id': 'o1', 'created_at': 1000 + i}
+        for i in range(45)
+    }
+    seed(portal, {'users': {'v1': {'type': 'individual', 'skills': ['driving']}}, 'help_requests': requests})
+    client = portal.app.test_client()
+    login(client, 'v1')
+
+    seen = []
+    page = client.get('/volunteer-dashboard?view=all').get_data(as_text=True)
+    while True:
+        seen.extend(card_ids(page))
+        link = older_link(page)
+        if not link:
+            break
+        assert 'view=all' in link
+        page = client.get(link).get_data(as_text=True)
+
+    assert seen == [f"req{i:02d}" for i in reversed(range(45))]
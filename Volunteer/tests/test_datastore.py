@@ -0,0 +1,112 @@
+import pytest
+
+from datastore import LocalDatabase, Repository, decode_cursor, encode_cursor, increment
+
+
+@pytest.fixture
+def database():
+    database = LocalDatabase()
+    database.write('help_requests', {
+        'a': {'created_at': 30, 'priority': 'low'},
+        'b': {'created_at': 10, 'priority': 'urgent'},
+        'c': {'created_at': 20, 'priority': 'low'},
+        'd': {'created_at': 20, 'priority': 'high'},
+        'e': {'priority': 'low'},
+    })
+    return database
+
+
+@pytest.fixture
+def repo(database):
+    return Repository(lambda: database)
+
+
+def test_order_by_child_sorts_missing_values_first_and_ties_by_key(database):
+    result = database.child('help_requests').order_by_child('created_at').get().val()
+    assert list(result) == ['e', 'b', 'c', 'd', 'a']
+
+
+def test_start_at_end_at_and_equal_to(database):
+    ref = database.child('help_requests').order_by_child('created_at')
+    assert list(ref.start_at(20).get().val()) == ['c', 'd', 'a']
+    assert list(ref.end_at(20).get().val()) == ['e', 'b', 'c', 'd']
+    assert list(ref.start_at(15).end_at(25).get().val()) == ['c', 'd']
+    assert list(ref.equal_to(20).get().val()) == ['c', 'd']
+    assert ref.equal_to(99).get().val() is None
+
+
+def test_limits_apply_after_ordering_and_filtering(database):
+    ref = database.child('help_requests').order_by_child('created_at')
+    assert list(ref.limit_to_first(2).get().val()) == ['e', 'b']
+    assert list(ref.limit_to_last(2).get().val()) == ['d', 'a']
+    assert list(ref.start_at(20).limit_to_first(1).get().val()) == ['c']
+    assert list(ref.end_at(20).limit_to_last(1).get().val()) == ['d']
+
+
+def test_order_by_key_and_shallow(database):
+    assert list(database.child('help_requests').order_by_key().start_at('c').get().val()) == ['c', 'd', 'e']
+    assert database.child('help_requests').shallow().get().val() == {key: True for key in 'abcde'}
+
+
+def test_increment_adds_to_existing_and_missing_values(database):
+    database.write('stats/views', 5)
+    database.write_many('', {'stats/views': increment(2), 'stats/accepts': increment()})
+    assert database.read('stats') == {'views': 7, 'accepts': 1}
+
+
+def test_increment_nested_in_set_value(database):
+    database.write('users/u1', {'name': 'A', 'count': 3})
+    database.write('users/u1', {'name': 'A', 'count': increment(4)})
+    assert database.read('users/u1/count') == 7
+
+
+def test_multi_path_update_writes_and_removes_together(database):
+    database.write_many('', {
+        'help_requests/a': None,
+        'organizations/o1/assigned_requests/a': {'status': 'assigned'},
+        'help_requests/b/priority': 'low',
+    })
+    assert database.read('help_requests/a') is None
+    assert database.read('organizations/o1/assigned_requests/a') == {'status': 'assigned'}
+    assert database.read('help_requests/b') == {'created_at': 10, 'priority': 'low'}
+
+
+def test_update_is_relative_to_the_reference(database):
+    database.child('help_requests', 'c').update({'status': 'active', 'meta/seen': True})
+    assert database.read('help_requests/c') == {'created_at': 20, 'priority': 'low',
+                                                'status': 'active', 'meta': {'seen': True}}
+
+
+def test_removing_last_child_prunes_empty_parents(database):
+    database.write('organizations/o1/volunteers/v1', True)
+    database.write('organizations/o1/volunteers/v1', None)
+    assert database.read('organizations') is None
+
+
+def test_reads_are_copies(database):
+    record = database.read('help_requests/a')
+    record['priority'] = 'urgent'
+    assert database.read('help_requests/a/priority') == 'low'
+
+
+def test_push_keys_are_ordered():
+    database = LocalDatabase()
+    keys = [database.generate_key() for _ in range(100)]
+    assert keys == sorted(keys) and len(set(keys)) == 100
+
+
+def test_page_walks_the_collection_newest_first(repo):
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = repo.page('help_requests', 'created_at', 2, cursor=cursor)
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert seen == ['a', 'd', 'c', 'b', 'e']
+
+
+def test_cursor_round_trip_and_malformed_cursor():
+    assert decode_cursor(encode_cursor(20, 'c')) == (20, 'c')
+    with pytest.raises(ValueError):
+        decode_cursor('not a cursor')
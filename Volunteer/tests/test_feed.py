@@ -0,0 +1,49 @@
+from conftest import seed
+
+
+def open_request(priority='low', created_at=1000, location='Pune', skills=('cooking',)):
+    return {'status': 'active', 'priority': priority, 'created_at': created_at, 'location': location,
+            'skills': list(skills), 'org_id': 'o1'}
+
+
+def test_urgent_view_feed_only_sends_the_most_urgent_page(portal):
+    requests = {f"r{i:02d}": open_request(created_at=1000 + i) for i in range(portal.DASHBOARD_PAGE_SIZE + 5)}
+    seed(portal, {'users': {'v1': {'type': 'individual'}}, 'help_requests': requests})
+    predicate = portal.feed_filter('v1', 'individual', {'view': 'urgent'})
+
+    shown = set(portal.urgency_queue.next_requests(portal.DASHBOARD_PAGE_SIZE))
+    assert {request_id for request_id, record in requests.items() if predicate(record)} == shown
+    # A new urgent request jumps the queue; a new low priority one does not
+    assert predicate(open_request('urgent', created_at=1100))
+    assert not predicate(open_request('low', created_at=1100))
+
+
+def test_nearby_view_feed_only_sends_requests_within_the_radius(portal):
+    seed(portal, {'users': {'v1': {'type': 'individual', 'location': 'Pune'}, 'v2': {'type': 'individual'}}})
+
+    predicate = portal.feed_filter('v1', 'individual', {'view': 'nearby'})
+    assert predicate(open_request(location='Pune'))
+    assert not predicate(open_request(location='Delhi'))
+    assert not predicate(open_request(location='Somewhere unknown'))
+
+    # The browser position and radius sent by the page win over the saved location
+    predicate = portal.feed_filter('v1', 'individual', {'view': 'nearby', 'lat': '28.61', 'lng': '77.21',
+                                                        'radius': '20'})
+    assert predicate(open_request(location='Delhi'))
+    assert not predicate(open_request(location='Pune'))
+
+    # Without any location the nearby view is empty, and so is its feed
+    predicate = portal.feed_filter('v2', 'individual', {'view': 'nearby'})
+    assert not predicate(open_request(location='Pune'))
+
+
+def test_matches_and_organization_feeds(portal):
+    seed(portal, {'users': {'v1': {'type': 'individual', 'skills': ['Cooking']}}})
+
+    matches = portal.feed_filter('v1', 'individual', {})
+    assert matches(open_request(skills=['cooking']))
+    assert not matches(open_request(skills=['driving']))
+
+    own = portal.feed_filter('o1', 'organization', {})
+    assert own(open_request())
+    assert not own(dict(open_request(), org_id='o2'))
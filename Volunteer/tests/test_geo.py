@@ -0,0 +1,101 @@
+import math
+import random
+import re
+
+import pytest
+
+from conftest import login, seed
+from datastore import LocalDatabase, Repository
+from geo import GeoIndex, geocode, haversine_km, valid_coordinates
+from indexes import SnapshotLoader
+
+PUNE = (18.5204, 73.8567)
+DELHI = (28.6139, 77.2090)
+
+
+def located(lat, lng, **fields):
+    return dict({'status': 'active', 'priority': 'low', 'coordinates': {'lat': lat, 'lng': lng}}, **fields)
+
+
+def make_index(requests, **options):
+    database = LocalDatabase()
+    database.write('help_requests', requests)
+    repo = Repository(lambda: database)
+    return repo, GeoIndex(SnapshotLoader(repo), **options)
+
+
+def test_geocode_and_coordinate_validation():
+    assert geocode('Koregaon Park, Pune') == PUNE
+    assert geocode('18.5, 73.8') == (18.5, 73.8)
+    assert geocode('Atlantis') is None
+    assert valid_coordinates('91', '0') is None
+    assert valid_coordinates('x', '0') is None
+    assert math.isclose(haversine_km(PUNE, DELHI), 1178, rel_tol=0.01)
+
+
+def test_nearest_and_within_match_brute_force():
+    rng = random.Random(7)
+    requests = {f"r{i:03d}": located(rng.uniform(17, 20), rng.uniform(72, 76)) for i in range(300)}
+    _, index = make_index(requests)
+    distances = sorted((haversine_km(PUNE, (record['coordinates']['lat'], record['coordinates']['lng'])), request_id)
+                       for request_id, record in requests.items())
+
+    assert [request_id for request_id, _ in index.nearest(PUNE, k=15)] == [request_id for _, request_id in distances[:15]]
+    assert sorted(request_id for request_id, _ in index.within(PUNE, 60)) == \
+        sorted(request_id for distance, request_id in distances if distance <= 60)
+    assert all(distance <= 60 for _, distance in index.nearest(PUNE, k=300, max_km=60))
+
+
+def test_index_follows_writes():
+    repo, index = make_index({'near': located(*PUNE), 'far': located(*DELHI)})
+    assert [request_id for request_id, _ in index.nearest(PUNE, k=1)] == ['near']
+
+    repo.update_many({'help_requests/near': None, 'help_requests/new': located(18.53, 73.85)})
+
+    assert [request_id for request_id, _ in index.nearest(PUNE, k=2)] == ['new', 'far']
+
+
+@pytest.fixture
+def volunteer_client(portal):
+    seed(portal, {
+        'users': {'v1': {'type': 'individual', 'location': 'Pune'}, 'v2': {'type': 'individual'}},
+        'help_requests': {
+            'pune': {'title': 'In Pune', 'description': 'd', 'location': 'Pune', 'status': 'active',
+                     'priority': 'low', 'created_at': 1000},
+            'delhi': {'title': 'In Delhi', 'description': 'd', 'location': 'Delhi', 'status': 'active',
+                      'priority': 'low', 'created_at': 1001},
+        },
+    })
+    return portal.app.test_client()
+
+
+def card_ids(response):
+    return re.findall(r'class="request-card" data-request-id="([^"]+)"', response.get_data(as_text=True))
+
+
+def test_nearby_view_uses_saved_location_without_browser_position(volunteer_client):
+    login(volunteer_client, 'v1')
+    assert card_ids(volunteer_client.get('/volunteer-dashboard?view=nearby')) == ['pune']
+
+
+def test_nearby_view_prefers_browser_position(volunteer_client):
+    login(volunteer_client, 'v1')
+    response = volunteer_client.get('/volunteer-dashboard?view=nearby&lat=28.61&lng=77.21')
+    assert card_ids(response) == ['delhi']
+
+    response = volunteer_client.get('/volunteer-dashboard?view=nearby&lat=28.61&lng=77.21&radius=2000')
+    assert card_ids(response) == ['delhi', 'pune']
+
+
+def test_nearby_view_without_any_location_is_empty(volunteer_client):
+    login(volunteer_client, 'v2')
+    assert card_ids(volunteer_client.get('/volunteer-dashboard?view=nearby')) == []
+    # An invalid browser position is ignored like a missing one
+    assert card_ids(volunteer_client.get('/volunteer-dashboard?view=nearby&lat=abc&lng=77')) == []
+    assert card_ids(volunteer_client.get('/volunteer-dashboard?view=nearby&lat=18.52&lng=73.86')) == ['pune']
+
+
+def test_nearest_tab_asks_the_browser_for_its_position(volunteer_client):
+    login(volunteer_client, 'v1')
+    page = volunteer_client.get('/volunteer-dashboard').get_data(as_text=True)
+    assert 'view=nearby" class="filter-tab' in page and 'data-geolocate' in page
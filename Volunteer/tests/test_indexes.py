@@ -0,0 +1,130 @@
+import threading
+
+from datastore import LocalDatabase, Repository
+from indexes import SnapshotLoader
+from matching import SkillMatcher
+from urgency import UrgencyQueue
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def open_request(skill, created_at=1000):
+    return {'status': 'active', 'priority': 'low', 'skills': [skill], 'created_at': created_at}
+
+
+def make_loader(requests, **options):
+    database = LocalDatabase()
+    database.write('help_requests', requests)
+    repo = Repository(lambda: database)
+    downloads = []
+    download = repo.get_help_requests
+
+    def counted():
+        downloads.append(1)
+        return download()
+    repo.get_help_requests = counted
+    return repo, SnapshotLoader(repo, **options), downloads
+
+
+def test_indexes_share_one_download():
+    repo, loader, downloads = make_loader({'r1': open_request('cooking'), 'r2': open_request('driving')})
+    matcher = SkillMatcher(loader)
+    queue = UrgencyQueue(loader)
+
+    assert [request_id for request_id, _ in matcher.match(['cooking'])] == ['r1']
+    assert len(queue) == 2
+    assert len(downloads) == 1
+
+
+def test_own_writes_reach_every_index_without_a_download():
+    repo, loader, downloads = make_loader({'r1': open_request('cooking')})
+    matcher = SkillMatcher(loader)
+    queue = UrgencyQueue(loader)
+    len(queue)
+
+    repo.update_many({'help_requests/r1': None, 'help_requests/r2': open_request('cooking')})
+
+    assert [request_id for request_id, _ in matcher.match(['cooking'])] == ['r2']
+    assert list(queue.next_requests()) == ['r2']
+    assert len(downloads) == 1
+
+
+def test_write_during_download_is_not_lost():
+    repo, loader, _ = make_loader({'r1': open_request('cooking'), 'r2': open_request('cooking', 2000)})
+    queue = UrgencyQueue(loader)
+    download = repo.get_help_requests
+
+    def download_then_accept():
+        requests = download()
+        # r1 is accepted after the download read it but before the snapshot is swapped in
+        repo.remove('help_requests/r1')
+        return requests
+    repo.get_help_requests = download_then_accept
+
+    assert list(queue.next_requests()) == ['r2']
+
+
+def test_stale_queue_refreshes_once_in_the_background():
+    clock = Clock()
+    repo, loader, downloads = make_loader({'r1': open_request('cooking')}, refresh_interval=60, clock=clock)
+    queue = UrgencyQueue(loader)
+    assert len(queue) == 1
+
+    # Another worker adds a request; this worker sees it only after a refresh
+    repo.ref('help_requests/r2').set(open_request('cooking'))
+    release = threading.Event()
+    download = repo.get_help_requests
+
+    def slow_download():
+        release.wait(5)
+        return download()
+    repo.get_help_requests = slow_download
+
+    clock.now = 61
+    # Readers are served the current queue while the refresh is in flight
+    assert len(queue) == 1
+    assert len(queue) == 1
+    release.set()
+    loader.refresh()
+
+    assert len(queue) == 2
+    assert len(downloads) == 2
+
+
+def test_failed_first_download_is_retried():
+    repo, loader, downloads = make_loader({'r1': open_request('cooking')})
+    queue = UrgencyQueue(loader)
+    download = repo.get_help_requests
+
+    def failing():
+        raise IOError('unreachable')
+    repo.get_help_requests = failing
+    try:
+        len(queue)
+    except IOError:
+        pass
+    else:
+        raise AssertionError('expected the download error')
+
+    repo.get_help_requests = download
+    assert len(queue) == 1
+
+
+def test_feed_starts_from_the_shared_queue():
+    from feed import RequestFeed
+    repo, loader, downloads = make_loader({'r1': open_request('cooking')})
+    queue = UrgencyQueue(loader)
+    feed = RequestFeed(loader)
+    len(queue)
+
+    subscription = feed.subscribe(lambda request_data: True)
+    repo.remove('help_requests/r1')
+
+    assert 'event: remove' in subscription.next_message(1)
+    assert len(downloads) == 1
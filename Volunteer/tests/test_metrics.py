@@ -0,0 +1,37 @@
+import pytest
+
+
+def test_pool_gauges_do_not_start_firebase(portal):
+    text = portal.app.test_client().get('/metrics').get_data(as_text=True)
+
+    assert not portal.clients.client_ready
+    assert 'profile_cache_' in text
+
+
+def test_pool_stats_are_exported_once_firebase_is_used(portal, monkeypatch):
+    class Session:
+        @staticmethod
+        def stats():
+            return {'in_use': 2, 'idle': 5, 'wait_time_avg': 0.25}
+
+    class Firebase:
+        requests = Session()
+
+    monkeypatch.setattr(type(portal.clients), 'client_ready', property(lambda self: True))
+    monkeypatch.setattr(type(portal.clients), 'firebase', property(lambda self: Firebase))
+
+    text = portal.app.test_client().get('/metrics').get_data(as_text=True)
+
+    assert 'http_pool_in_use 2' in text
+    assert 'http_pool_idle 5' in text
+    assert 'http_pool_wait_time_avg 0.25' in text
+
+
+@pytest.mark.parametrize('path', ['/metrics', '/http-pool-stats', '/job-queue-stats'])
+def test_metrics_routes_require_the_token(portal, monkeypatch, path):
+    monkeypatch.setenv('METRICS_TOKEN', 'secret')
+    client = portal.app.test_client()
+
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get(path, headers={'Authorization': 'Bearer secret'}).status_code == 200
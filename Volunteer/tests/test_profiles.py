@@ -0,0 +1,29 @@
+from conftest import login, seed
+
+
+def test_add_skill_does_not_overwrite_skills_missing_from_cached_profile(portal):
+    seed(portal, {'users': {'v1': {'type': 'individual', 'skills': ['first aid']}}})
+    assert portal.repo.get_user('v1')['skills'] == ['first aid']
+    # Another worker adds a skill; this worker's cached profile is now stale
+    portal.repo.ref('users/v1/skills').set(['first aid', 'driving'])
+
+    client = portal.app.test_client()
+    login(client, 'v1')
+    response = client.post('/add-skill', json={'skill': 'cooking'})
+
+    assert response.get_json()['success']
+    assert portal.repo.get('users/v1/skills') == ['first aid', 'driving', 'cooking']
+
+
+def test_add_domain_does_not_overwrite_domains_missing_from_cached_profile(portal):
+    seed(portal, {'organizations': {'o1': {'type': 'organization', 'domains': ['visual_assistance']}}})
+    portal.repo.get_organization('o1')
+    portal.repo.ref('organizations/o1/domains').set(['visual_assistance', 'mobility_support'])
+
+    client = portal.app.test_client()
+    login(client, 'o1', 'organization')
+    response = client.post('/add-domain', json={'domain': 'hearing_assistance'})
+
+    assert response.get_json()['success']
+    assert portal.repo.get('organizations/o1/domains') == ['visual_assistance', 'mobility_support',
+                                                          'hearing_assistance']
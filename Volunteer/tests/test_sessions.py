@@ -0,0 +1,177 @@
+import os
+
+import pytest
+from flask import Flask, session
+
+from sessions import FileSessionStore, MemorySessionStore, ServerSessionInterface
+
+SID_LENGTH = 43
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def store(tmp_path):
+    return FileSessionStore(str(tmp_path / 'sessions'), ttl=3600)
+
+
+def make_app(store, **config):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.config.update(config)
+    app.session_interface = ServerSessionInterface(store)
+
+    @app.route('/login/<name>')
+    def login(name):
+        session.regenerate()
+        session['user'] = name
+        return 'ok'
+
+    @app.route('/whoami')
+    def whoami():
+        return session.get('user', '')
+
+    @app.route('/logout')
+    def logout():
+        session.pop('user', None)
+        return 'ok'
+
+    return app
+
+
+def session_cookie(response):
+    return [header for header in response.headers.getlist('Set-Cookie') if header.startswith('session=')]
+
+
+def stored_sids(store):
+    return sorted(name for name in os.listdir(store.directory) if not name.endswith('.tmp'))
+
+
+def test_anonymous_requests_store_nothing(store):
+    client = make_app(store).test_client()
+    response = client.get('/whoami')
+    assert session_cookie(response) == []
+    assert stored_sids(store) == []
+
+
+def test_cookie_holds_only_the_session_id(store):
+    client = make_app(store).test_client()
+    client.get('/login/alice')
+    sid = client.get_cookie('session').value
+    assert len(sid) == SID_LENGTH and stored_sids(store) == [sid]
+    assert 'alice' not in sid
+    assert client.get('/whoami').get_data(as_text=True) == 'alice'
+
+
+def test_login_rotates_the_session_id(store):
+    client = make_app(store).test_client()
+    client.get('/login/alice')
+    first = client.get_cookie('session').value
+
+    client.get('/login/bob')
+    second = client.get_cookie('session').value
+
+    assert second != first
+    assert stored_sids(store) == [second]
+    assert client.get('/whoami').get_data(as_text=True) == 'bob'
+
+
+def test_emptied_session_is_deleted_with_its_cookie(store):
+    client = make_app(store).test_client()
+    client.get('/login/alice')
+
+    response = client.get('/logout')
+
+    assert stored_sids(store) == []
+    assert any('Expires=Thu, 01 Jan 1970' in header for header in session_cookie(response))
+    assert client.get_cookie('session') is None
+
+
+@pytest.mark.parametrize('sid', ['short', '../' + 'a' * 40, 'a' * 42 + '!', 'a' * 44])
+def test_malformed_session_ids_are_never_looked_up(store, sid):
+    loaded = []
+    store.load = lambda sid: loaded.append(sid)
+    client = make_app(store).test_client()
+    client.set_cookie('session', sid)
+
+    assert client.get('/whoami').get_data(as_text=True) == ''
+    assert loaded == []
+
+
+def test_undecodable_session_data_is_discarded(store):
+    client = make_app(store).test_client()
+    client.get('/login/alice')
+    sid = client.get_cookie('session').value
+    with open(os.path.join(store.directory, sid), 'wb') as fh:
+        fh.write(b'not json')
+
+    assert client.get('/whoami').get_data(as_text=True) == ''
+    assert stored_sids(store) == []
+
+
+def test_expired_session_is_not_loaded_and_is_removed(tmp_path):
+    clock = Clock(1_000_000)
+    store = FileSessionStore(str(tmp_path), ttl=60, clock=clock)
+    store.save('a' * SID_LENGTH, b'{}')
+    os.utime(store._path('a' * SID_LENGTH), (clock.now, clock.now))
+
+    clock.now += 61
+    assert store.load('a' * SID_LENGTH) is None
+    assert stored_sids(store) == []
+
+
+def test_prune_removes_expired_then_least_recently_used(tmp_path):
+    clock = Clock(1_000_000)
+    store = FileSessionStore(str(tmp_path), ttl=60, max_sessions=2, prune_every=10 ** 6, clock=clock)
+    for age, sid in [(120, 'expired'), (30, 'oldest'), (20, 'older'), (10, 'newest')]:
+        store.save(sid, b'{}')
+        os.utime(store._path(sid), (clock.now - age, clock.now - age))
+
+    store.prune()
+
+    assert stored_sids(store) == ['newest', 'older']
+
+
+def test_every_nth_save_prunes(tmp_path):
+    store = FileSessionStore(str(tmp_path), ttl=60, prune_every=3)
+    for sid in ['s1', 's2']:
+        store.save(sid, b'{}')
+        # Last used long ago
+        os.utime(store._path(sid), (1, 1))
+    assert stored_sids(store) == ['s1', 's2']
+
+    store.save('s3', b'{}')
+
+    assert stored_sids(store) == ['s3']
+
+
+def test_memory_store_round_trip():
+    store = MemorySessionStore(ttl=60)
+    store.save('sid', b'data')
+    assert store.load('sid') == b'data'
+    store.delete('sid')
+    assert store.load('sid') is None
+
+
+def test_browser_session_cookie_is_set_only_when_the_id_changes(store):
+    client = make_app(store).test_client()
+    response = client.get('/login/alice')
+    assert session_cookie(response) and 'Expires' not in session_cookie(response)[0]
+    assert session_cookie(client.get('/whoami')) == []
+
+
+def test_permanent_session_cookie_is_refreshed_on_every_response(store):
+    client = make_app(store, SESSION_PERMANENT=True).test_client()
+    client.get('/login/alice')
+    sid = client.get_cookie('session').value
+
+    cookies = session_cookie(client.get('/whoami'))
+
+    assert len(cookies) == 1
+    assert cookies[0].startswith(f"session={sid};") and 'Expires=' in cookies[0]
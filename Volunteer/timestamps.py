@@ -0,0 +1,72 @@
+"""Timestamp parsing and epoch fields for stored records.
+
+Records keep their ISO-8601 strings (``created_at``, ``accepted_at``, ...)
+and, for anything written since, a numeric ``<field>_ms`` epoch in
+milliseconds next to them. Readers use the epoch when present and otherwise
+parse the string through a bounded memo, so rendering a dashboard does no
+generic date parsing.
+"""
+from datetime import datetime, timezone
+from functools import lru_cache
+
+EPOCH_SUFFIX = '_ms'
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso(text):
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        try:
+            # Older Pythons reject the 'Z' suffix
+            dt = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        except ValueError:
+            dt = _parse_fallback(text)
+    if dt is not None and dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
+
+def _parse_fallback(text):
+    """Slow path for the odd non-ISO string in legacy data."""
+    from dateutil.parser import parse
+    try:
+        return parse(text)
+    except (ValueError, OverflowError):
+        return None
+
+
+def parse_timestamp(value):
+    """A timezone-aware datetime from an ISO string, epoch milliseconds or datetime.
+
+    Naive values are taken as UTC. Returns None for anything unparseable.
+    """
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value / 1000, tz=timezone.utc)
+    if isinstance(value, str) and value:
+        return _parse_iso(value.strip())
+    return None
+
+
+def epoch_ms(value):
+    """Epoch milliseconds for ``value`` (see ``parse_timestamp``), or None."""
+    dt = parse_timestamp(value)
+    return int(dt.timestamp() * 1000) if dt else None
+
+
+def stamp(field, now):
+    """``{field: now, field_ms: epoch}`` for merging into a record."""
+    return {field: now, field + EPOCH_SUFFIX: epoch_ms(now)}
+
+
+def record_epoch(record, field):
+    """Epoch seconds of ``record[field]``, preferring the stored epoch; None if unknown."""
+    epoch = record.get(field + EPOCH_SUFFIX)
+    if isinstance(epoch, (int, float)) and not isinstance(epoch, bool):
+        return epoch / 1000
+    dt = parse_timestamp(record.get(field))
+    return dt.timestamp() if dt else None
@@ -0,0 +1,168 @@
+"""Help request lifecycle transitions.
+
+Every move (accept, assign, complete, archive) is one fan-out multi-path
+update that covers the request record, its index entries and the volunteer's
+stats and assignment lists. Counters use server-side increments, so they need
+no prior read of the volunteer record and stay correct under concurrency. A
+transition therefore costs a single write round trip and either happens
+completely or not at all, so a crash can no longer leave a request in two
+collections or in none.
+"""
+from archive import ARCHIVE_ROOT, partition_key
+from datastore import increment
+from indexes import index_updates
+from timestamps import stamp
+
+
+def move_updates(request_id, source, target, before, after):
+    """Update entries moving a request from ``source`` to ``target``."""
+    updates = {f"{source}/{request_id}": None, f"{target}/{request_id}": after}
+    updates.update(index_updates(request_id, before, after))
+    return updates
+
+
+def _increment_delta(value):
+    server_value = value.get('.sv') if isinstance(value, dict) else None
+    return server_value.get('increment') if isinstance(server_value, dict) else None
+
+
+def combine_updates(batches):
+    """Merge several transitions' updates into one; counter increments on the same path add up."""
+    combined = {}
+    for updates in batches:
+        for path, value in updates.items():
+            previous, delta = _increment_delta(combined.get(path)), _increment_delta(value)
+            if previous is not None and delta is not None:
+                value = increment(previous + delta)
+            combined[path] = value
+    return combined
+
+
+def accept_request(repo, request_id, request_data, volunteer_id, now):
+    """A volunteer accepts an open request: help_requests -> assigned_requests."""
+    assigned = dict(request_data, status="assigned", volunteer_id=volunteer_id, **stamp("accepted_at", now))
+
+    updates = move_updates(request_id, "help_requests", "assigned_requests", request_data, assigned)
+    updates.update({
+        f"users/{volunteer_id}/assignments_count": increment(1),
+        f"users/{volunteer_id}/last_assignment": now,
+        f"users/{volunteer_id}/active_assignments/{request_id}": {
+            "request_id": request_id,
+            "title": request_data.get('title'),
+            "accepted_at": now
+        }
+    })
+    repo.update_many(updates)
+    return assigned
+
+
+def complete_request(repo, request_id, request_data, now):
+    """The assigned volunteer completes a request: assigned_requests -> completed_requests."""
+    volunteer_id = request_data.get('volunteer_id')
+    completed = dict(request_data, status="completed", **stamp("completed_at", now))
+
+    updates = move_updates(request_id, "assigned_requests", "completed_requests", request_data, completed)
+    updates.update({
+        f"users/{volunteer_id}/completions_count": increment(1),
+        f"users/{volunteer_id}/last_completion": now,
+        f"users/{volunteer_id}/active_assignments/{request_id}": None,
+        f"users/{volunteer_id}/completed_assignments/{request_id}": {
+            "request_id": request_id,
+            "title": request_data.get('title'),
+            "completed_at": now
+        }
+    })
+    repo.update_many(updates)
+    return completed
+
+
+def assign_updates(request_id, request_data, org_id, org_name, volunteer_id, volunteer_data, notes, now):
+    """``(assigned_record, updates)`` for assigning an open request to a volunteer."""
+    assigned = dict(
+        request_data,
+        status="assigned",
+        volunteer_id=volunteer_id,
+        volunteer_name=volunteer_data.get('fullName', 'Volunteer'),
+        assignment_notes=notes,
+        **stamp("assigned_at", now)
+    )
+
+    updates = move_updates(request_id, "help_requests", f"organizations/{org_id}/assigned_requests",
+                           request_data, assigned)
+    updates.update({
+        f"users/{volunteer_id}/assignments_count": increment(1),
+        f"users/{volunteer_id}/last_assignment": now,
+        f"users/{volunteer_id}/active_assignments/{request_id}": {
+            "request_id": request_id,
+            "title": request_data.get('title'),
+            "assigned_at": now,
+            "org_id": org_id,
+            "org_name": org_name
+        }
+    })
+    return assigned, updates
+
+
+def assign_request(repo, request_id, request_data, org_id, org_name, volunteer_id, volunteer_data, notes, now):
+    """An organization assigns one of its open requests to a volunteer."""
+    assigned, updates = assign_updates(request_id, request_data, org_id, org_name,
+                                       volunteer_id, volunteer_data, notes, now)
+    repo.update_many(updates)
+    return assigned
+
+
+def assign_requests(repo, org_id, org_name, assignments, now):
+    """Assign many requests in one write.
+
+    ``assignments`` is a list of ``(request_id, request_data, volunteer_id,
+    volunteer_data, notes)``; returns the assigned records by request ID.
+    """
+    assigned = {}
+    batches = []
+    for request_id, request_data, volunteer_id, volunteer_data, notes in assignments:
+        assigned[request_id], updates = assign_updates(request_id, request_data, org_id, org_name,
+                                                       volunteer_id, volunteer_data, notes, now)
+        batches.append(updates)
+    if batches:
+        repo.update_many(combine_updates(batches))
+    return assigned
+
+
+def org_complete_request(repo, org_id, request_id, request_data, was_active_assignment, now):
+    """An organization marks one of its assigned requests as completed.
+
+    ``was_active_assignment`` says whether the request is still in the
+    volunteer's ``active_assignments``; only then is it moved to their
+    ``completed_assignments``.
+    """
+    completed = dict(request_data, status="completed", completed_by_org=True, **stamp("completed_at", now))
+
+    updates = move_updates(request_id, f"organizations/{org_id}/assigned_requests",
+                           f"organizations/{org_id}/completed_requests", request_data, completed)
+
+    volunteer_id = request_data.get('volunteer_id')
+    if volunteer_id:
+        updates.update({
+            f"users/{volunteer_id}/completions_count": increment(1),
+            f"users/{volunteer_id}/last_completion": now
+        })
+        if was_active_assignment:
+            updates.update({
+                f"users/{volunteer_id}/active_assignments/{request_id}": None,
+                f"users/{volunteer_id}/completed_assignments/{request_id}": {
+                    "request_id": request_id,
+                    "title": request_data.get('title'),
+                    "completed_at": now,
+                    "org_id": org_id
+                }
+            })
+    repo.update_many(updates)
+    return completed
+
+
+def archive_request(repo, org_id, request_id, request_data, now):
+    """An organization archives a completed request into its monthly archive partition."""
+    archived = dict(request_data, **stamp("archived_at", now))
+    repo.update_many(move_updates(request_id, f"organizations/{org_id}/completed_requests",
+                                  f"{ARCHIVE_ROOT}/{partition_key(archived)}", request_data, archived))
+    return archived
@@ -0,0 +1,159 @@
+"""Pooled keep-alive HTTP transport for the Firebase REST clients."""
+import os
+import threading
+import time
+import weakref
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+class PoolMetrics:
+    """Connection checkout counters shared by every pool of one session."""
+
+    def __init__(self, pool_size, pool_timeout):
+        self.pool_size = pool_size
+        self.pool_timeout = pool_timeout
+        self._lock = threading.Lock()
+        self._pools = weakref.WeakSet()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._pools = weakref.WeakSet()
+            self.checkouts = 0
+            self.in_use = 0
+            self.opened = 0
+            self.wait_time = 0.0
+            self.max_wait = 0.0
+            self.timeouts = 0
+
+    def track(self, pool):
+        with self._lock:
+            self._pools.add(pool)
+
+    def checked_out(self, waited):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.wait_time += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def returned(self):
+        with self._lock:
+            self.in_use -= 1
+
+    def snapshot(self):
+        with self._lock:
+            # urllib3 pre-fills each pool's queue with None placeholders; only
+            # real connections sitting in the queue are idle keep-alive sockets
+            idle = sum(1 for pool in self._pools for conn in list(pool.pool.queue) if conn is not None)
+            return {
+                'pool_size': self.pool_size,
+                'hosts': len(self._pools),
+                'in_use': self.in_use,
+                'idle': idle,
+                'opened': self.opened,
+                'checkouts': self.checkouts,
+                'reused': max(0, self.checkouts - self.opened),
+                'wait_time_total': self.wait_time,
+                'wait_time_avg': self.wait_time / self.checkouts if self.checkouts else 0.0,
+                'wait_time_max': self.max_wait,
+                'timeouts': self.timeouts,
+            }
+
+
+def _instrumented(base, metrics):
+    class InstrumentedPool(base):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            metrics.track(self)
+
+        def _new_conn(self):
+            with metrics._lock:
+                metrics.opened += 1
+            return super()._new_conn()
+
+        def _get_conn(self, timeout=None):
+            # Bound the wait for a free connection instead of blocking forever
+            started = time.monotonic()
+            try:
+                conn = super()._get_conn(timeout=metrics.pool_timeout if timeout is None else timeout)
+            except Exception:
+                with metrics._lock:
+                    metrics.timeouts += 1
+                raise
+            metrics.checked_out(time.monotonic() - started)
+            return conn
+
+        def _put_conn(self, conn):
+            try:
+                super()._put_conn(conn)
+            finally:
+                metrics.returned()
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter with a bounded, blocking, instrumented connection pool per host."""
+
+    def __init__(self, metrics, max_retries=3):
+        self.metrics = metrics
+        super().__init__(pool_connections=4, pool_maxsize=metrics.pool_size,
+                         pool_block=True, max_retries=max_retries)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _instrumented(HTTPConnectionPool, self.metrics),
+            'https': _instrumented(HTTPSConnectionPool, self.metrics),
+        }
+
+
+class PooledSession(requests.Session):
+    """``requests.Session`` that reuses up to ``pool_size`` connections per host.
+
+    Connections are kept alive between calls, so only the first call to a
+    host pays for the TCP and TLS handshakes. Callers beyond ``pool_size``
+    wait up to ``pool_timeout`` seconds for a free connection. After a fork
+    the adapters are rebuilt, so a worker never writes to a socket it
+    inherited from the parent process.
+
+    ``on_transfer(nbytes)``, if given, is called after each non-streaming
+    call with the request and response body sizes.
+    """
+
+    def __init__(self, pool_size=10, pool_timeout=30, max_retries=3, on_transfer=None):
+        super().__init__()
+        self.metrics = PoolMetrics(pool_size, pool_timeout)
+        self.max_retries = max_retries
+        self.on_transfer = on_transfer
+        self._mount_lock = threading.Lock()
+        self._mount_adapters()
+
+    def _mount_adapters(self):
+        self._pid = os.getpid()
+        self.metrics.reset()
+        for scheme in ('http://', 'https://'):
+            self.mount(scheme, PooledAdapter(self.metrics, max_retries=self.max_retries))
+
+    def get_adapter(self, url):
+        if self._pid != os.getpid():
+            with self._mount_lock:
+                if self._pid != os.getpid():
+                    self._mount_adapters()
+        return super().get_adapter(url)
+
+    def request(self, method, url, *args, **kwargs):
+        response = super().request(method, url, *args, **kwargs)
+        if self.on_transfer is not None and not kwargs.get('stream'):
+            body = response.request.body
+            sent = len(body) if isinstance(body, (bytes, str)) else 0
+            self.on_transfer(sent + len(response.content))
+        return response
+
+    def stats(self):
+        return self.metrics.snapshot()
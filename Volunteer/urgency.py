@@ -0,0 +1,93 @@
+"""Open help requests ordered by urgency, with aging.
+
+A request's urgency key is its creation time minus ``aging_seconds`` per
+priority level above 'low'. Smaller keys are more urgent. An urgent request
+is therefore placed as if it had been waiting 3 x ``aging_seconds`` longer
+than it has, and a low-priority request that has waited longer than that
+overtakes it. Because the key never changes while a request is open, aging
+needs no periodic re-sorting: the queue is a plain sorted list and inserts,
+removals and "next K" are a bisect or a slice.
+"""
+import bisect
+
+from indexes import LiveRequestIndex
+from matching import PRIORITY_RANK, created_timestamp
+
+
+def urgency_key(request_data, aging_seconds):
+    """Sort key for a request: smaller is more urgent."""
+    return created_timestamp(request_data) - PRIORITY_RANK.get(request_data.get('priority'), 0) * aging_seconds
+
+
+class UrgencyQueue(LiveRequestIndex):
+    """Priority queue of the open ``help_requests``, most urgent first."""
+
+    def __init__(self, loader, aging_hours=24):
+        super().__init__(loader)
+        self.aging_seconds = aging_hours * 3600
+        self._loading = False
+        self._clear()
+
+    def load(self, requests):
+        # A full (re)load appends every entry and sorts once
+        with self._lock:
+            self._loading = True
+            try:
+                super().load(requests)
+            finally:
+                self._loading = False
+            self._ordered.sort()
+
+    def _clear(self):
+        self._ordered = []
+        self._keys = {}
+        self._requests = {}
+
+    def _add(self, request_id, request_data):
+        entry = (urgency_key(request_data, self.aging_seconds), request_id)
+        if self._loading:
+            self._ordered.append(entry)
+        else:
+            bisect.insort(self._ordered, entry)
+        self._keys[request_id] = entry
+        self._requests[request_id] = request_data
+
+    def _discard(self, request_id):
+        entry = self._keys.pop(request_id, None)
+        if entry is None:
+            return
+        position = bisect.bisect_left(self._ordered, entry)
+        if position < len(self._ordered) and self._ordered[position] == entry:
+            del self._ordered[position]
+        self._requests.pop(request_id, None)
+
+    def __len__(self):
+        self.ensure_fresh()
+        return len(self._ordered)
+
+    def cutoff(self, k):
+        """Urgency key of the ``k``-th most urgent request (infinity with fewer than ``k``)."""
+        self.ensure_fresh()
+        with self._lock:
+            return self._ordered[k - 1][0] if 0 < k <= len(self._ordered) else float('inf')
+
+    def next(self, k=10, predicate=None):
+        """The ``k`` most urgent open requests as ``(request_id, request_data)`` pairs.
+
+        With ``predicate`` only requests it accepts are counted and returned.
+        """
+        self.ensure_fresh()
+        with self._lock:
+            if predicate is None:
+                return [(request_id, self._requests[request_id]) for _, request_id in self._ordered[:k]]
+            selected = []
+            for _, request_id in self._ordered:
+                if len(selected) >= k:
+                    break
+                if predicate(self._requests[request_id]):
+                    selected.append((request_id, self._requests[request_id]))
+            return selected
+
+    def next_requests(self, k=10, predicate=None):
+        """Like ``next`` but returns an ordered ``{request_id: request_data}`` map."""
+        return dict(self.next(k, predicate))